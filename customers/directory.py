@@ -0,0 +1,70 @@
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from salons.models import Salon
+
+
+DIRECTORY_VERSION_KEY = 'salon_directory:version'
+DIRECTORY_FIELDS = ('id', 'name', 'description', 'image', 'image_variants', 'address', 'phone')
+
+
+def get_directory_timeout():
+    return getattr(settings, 'SALON_DIRECTORY_CACHE_TIMEOUT', 300)
+
+
+def get_directory_version():
+    """
+    Verzija direktorijuma salona; deo je svakog cache ključa, pa se
+    invalidacija svodi na povećanje verzije umesto brisanja ključeva.
+    """
+    version = cache.get(DIRECTORY_VERSION_KEY)
+    if version is None:
+        cache.add(DIRECTORY_VERSION_KEY, _initial_version(), None)
+        version = cache.get(DIRECTORY_VERSION_KEY)
+    return version
+
+
+def _initial_version():
+    # Početna vrednost iz vremena, da posle izbacivanja ključa iz cache-a
+    # ne bi ponovo važile stare keširane strane sa istom verzijom
+    return int(time.time() * 1000)
+
+
+def invalidate_directory():
+    try:
+        cache.incr(DIRECTORY_VERSION_KEY)
+    except ValueError:
+        cache.set(DIRECTORY_VERSION_KEY, _initial_version(), None)
+
+
+def get_directory_queryset():
+    return Salon.objects.filter(is_approved=True, is_active=True).only(*DIRECTORY_FIELDS).order_by('name')
+
+
+def get_directory_page(page_number):
+    """
+    Vraća jednu stranu direktorijuma odobrenih i aktivnih salona iz cache-a,
+    a pri promašaju je računa jednim COUNT i jednim LIMIT upitom.
+    """
+    try:
+        page_number = max(int(page_number), 1)
+    except (TypeError, ValueError):
+        page_number = 1
+
+    version = get_directory_version()
+    page_size = getattr(settings, 'SALON_DIRECTORY_PAGE_SIZE', 12)
+    cache_key = f'salon_directory:{version}:{page_size}:{page_number}'
+
+    page_data = cache.get(cache_key)
+    if page_data is None:
+        page = Paginator(get_directory_queryset(), page_size).get_page(page_number)
+        page_data = {
+            'salons': list(page.object_list),
+            'number': page.number,
+            'num_pages': page.paginator.num_pages,
+        }
+        cache.set(cache_key, page_data, get_directory_timeout())
+
+    page_data['version'] = version
+    return page_data
@@ -1,3 +1,12 @@
-from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from salons.models import Salon
+from .directory import invalidate_directory
 
-# Create your models here.
+
+# SIGNALS
+@receiver(post_save, sender=Salon)
+@receiver(post_delete, sender=Salon)
+def invalidate_salon_directory(sender, instance, **kwargs):
+    """Svaka izmena salona (uključujući odobrenje) poništava cache direktorijuma"""
+    invalidate_directory()
@@ -24,6 +24,7 @@ const bookingRoot = document.getElementById('booking-form-root');
 if (bookingRoot) {
 	const slotsUrl = bookingRoot.dataset.slotsUrl;
 	const dateInput = document.getElementById('booking-date');
+	const serviceSelect = document.getElementById('service');
 	const slotSelect = document.getElementById('slot');
 	const submitBtn = document.getElementById('book-submit');
 
@@ -47,7 +48,7 @@ if (bookingRoot) {
 
 		slots.forEach((slot) => {
 			const option = document.createElement('option');
-			option.value = slot.id;
+			option.value = slot.begin_time;
 			option.textContent = slot.label;
 			slotSelect.appendChild(option);
 		});
@@ -86,7 +87,12 @@ if (bookingRoot) {
 		setLoading();
 
 		try {
-			const response = await fetch(`${slotsUrl}?date=${dateValue}`);
+			const params = new URLSearchParams({ date: dateValue });
+			if (serviceSelect?.value) {
+				params.set('service', serviceSelect.value);
+			}
+
+			const response = await fetch(`${slotsUrl}?${params.toString()}`);
 			if (!response.ok) {
 				throw new Error('Failed to fetch slots');
 			}
@@ -103,5 +109,9 @@ if (bookingRoot) {
 		dateInput.addEventListener('change', loadSlots);
 	}
 
+	if (serviceSelect) {
+		serviceSelect.addEventListener('change', loadSlots);
+	}
+
 	loadSlots();
 }
\ No newline at end of file
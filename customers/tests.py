@@ -1,3 +1,74 @@
+from datetime import date, timedelta
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.test import TestCase
+from salons.models import Salon, Service
+from salons.utils import create_default_working_hours
+from sistem_zakazivanja.models import UserProfile
 
-# Create your tests here.
+
+class HomePageTests(TestCase):
+    def test_home_renders_with_static_assets(self):
+        owner = User.objects.create_user('vlasnik', 'vlasnik@example.com', 'lozinka')
+        Salon.objects.create(
+            owner=owner,
+            name='salon-test',
+            description='opis',
+            address='adresa',
+            phone='060000000',
+            is_approved=True,
+            is_active=True,
+        )
+
+        response = self.client.get('/customers/home/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'salon-test')
+        self.assertContains(response, '/static/customers/css/customers.css')
+
+
+class AvailableSlotsConditionalTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        owner = User.objects.create_user('vlasnik', 'vlasnik@example.com', 'lozinka')
+        self.salon = Salon.objects.create(
+            owner=owner,
+            name='salon-test',
+            description='opis',
+            address='adresa',
+            phone='060000000',
+            is_approved=True,
+            is_active=True,
+        )
+        create_default_working_hours(self.salon)
+        self.service = Service.objects.create(salon=self.salon, name='šišanje', description='opis', price=1000, duration=30)
+
+        customer = User.objects.create_user('musterija', 'musterija@example.com', 'lozinka')
+        UserProfile.objects.filter(user=customer).update(role='musterija', email_verified=True)
+        self.client.force_login(customer)
+
+        self.target_date = date.today() + timedelta(days=1)
+        while self.target_date.weekday() >= 5:
+            self.target_date += timedelta(days=1)
+        self.url = f'/customers/{self.salon.name}/slobodni-termini/?date={self.target_date.isoformat()}'
+
+    def test_unchanged_day_returns_304_until_booking(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/customers/{self.salon.name}/zakazi/', {
+                'service': self.service.id,
+                'date': self.target_date.isoformat(),
+                'slot': '09:00',
+            })
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertNotIn('09:00', [slot['begin_time'] for slot in response.json()['slots']])
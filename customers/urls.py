@@ -1,12 +1,16 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
 app_name = 'customers'
 
+available_slots_view = views.available_slots_async if settings.ASYNC_AVAILABILITY_VIEWS else views.available_slots
+
 urlpatterns = [
     # pages
     path('home/', views.home, name='home'),
     path('moji-termini/', views.my_appointments, name='my_appointments'),
     path('<str:salon_name>/zakazi/', views.booking_form, name='booking_form'),
-    path('<str:salon_name>/slobodni-termini/', views.available_slots, name='available_slots'),
+    path('<str:salon_name>/slobodni-termini/', available_slots_view, name='available_slots'),
+    path('<str:salon_name>/slobodni-termini/period/', views.available_slots_range, name='available_slots_range'),
 ]
\ No newline at end of file
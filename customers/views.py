@@ -1,60 +1,86 @@
 from datetime import datetime, date
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.http import JsonResponse
+from django.views.decorators.http import condition
+from django.views.decorators.cache import cache_control
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import ValidationError
-from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
-from salons.models import Salon, Service, TimeSlot, Appointment
-from salons.utils import generate_time_slots_for_date
-from sistem_zakazivanja.models import UserProfile
+from salons.models import Salon, Service, Appointment
+from salons.availability import (
+    get_free_slots,
+    book_appointment,
+    is_slot_startable,
+    get_availability_etag,
+    get_range_maps,
+    aget_free_slots,
+    aget_availability_etag,
+)
+from sistem_zakazivanja.decorators import async_condition
+from sistem_zakazivanja.profiles import get_request_profile, aget_request_profile
+from sistem_zakazivanja.emails import enqueue_email
+from .directory import get_directory_page, get_directory_timeout
 
 def home(request):
-    salons = Salon.objects.filter(is_approved=True, is_active=True)
+    directory_page = get_directory_page(request.GET.get('page', 1))
 
-    return render(request, 'customers/home.html', {'salons': salons})
+    context = {
+        'salons': directory_page['salons'],
+        'page_number': directory_page['number'],
+        'num_pages': directory_page['num_pages'],
+        'directory_version': directory_page['version'],
+        'directory_timeout': get_directory_timeout(),
+    }
+    return render(request, 'customers/home.html', context)
+
+
+def _is_customer(request):
+    profile = get_request_profile(request)
+    return profile is not None and profile.role == 'musterija'
 
 
-def _is_customer(user):
-    profile, _ = UserProfile.objects.get_or_create(user=user)
-    return profile.role == 'musterija'
+async def _ais_customer(request):
+    profile = await aget_request_profile(request)
+    return profile is not None and profile.role == 'musterija'
 
 
 @login_required
 def booking_form(request, salon_name):
-    if not _is_customer(request.user):
+    if not _is_customer(request):
         messages.error(request, 'Samo musterije mogu zakazivati termine.')
         return redirect('redirect_after_login')
 
-    salon = get_object_or_404(Salon, name=salon_name, is_approved=True, is_active=True)
+    # owner za email obaveštenje posle zakazivanja
+    salon = get_object_or_404(Salon.objects.select_related('owner'), name=salon_name, is_approved=True, is_active=True)
     services = salon.services.all().order_by('name')
 
     if request.method == 'POST':
         service_id = request.POST.get('service')
-        slot_id = request.POST.get('slot')
+        date_str = request.POST.get('date')
+        slot_time = request.POST.get('slot')
         notes = request.POST.get('notes', '').strip()
 
-        if not service_id or not slot_id:
+        if not service_id or not date_str or not slot_time:
             messages.error(request, 'Izaberite uslugu i termin.')
             return redirect('customers:booking_form', salon_name=salon.name)
 
         service = get_object_or_404(Service, id=service_id, salon=salon)
-        slot = get_object_or_404(TimeSlot, id=slot_id, salon=salon)
 
-        if slot.status != 'dostupan':
+        try:
+            target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+            begin_time = datetime.strptime(slot_time, '%H:%M').time()
+        except ValueError:
+            messages.error(request, 'Neispravan datum ili termin.')
+            return redirect('customers:booking_form', salon_name=salon.name)
+
+        if not is_slot_startable(salon, target_date, begin_time, duration=service.duration):
             messages.error(request, 'Izabrani termin više nije dostupan. Izaberite drugi.')
             return redirect('customers:booking_form', salon_name=salon.name)
 
         try:
-            appointment = Appointment.objects.create(
-                salon=salon,
-                time_slot=slot,
-                customer=request.user,
-                service=service,
-                notes=notes,
-                status='na čekanju'
-            )
+            appointment = book_appointment(salon, target_date, begin_time, request.user, service, notes=notes)
+            slot = appointment.time_slot
 
             owner_email = salon.owner.email
             if owner_email:
@@ -83,14 +109,7 @@ def booking_form(request, salon_name):
                     </html>
                     """
 
-                    email_message = EmailMultiAlternatives(
-                        subject,
-                        message_text,
-                        settings.DEFAULT_FROM_EMAIL,
-                        [owner_email]
-                    )
-                    email_message.attach_alternative(message_html, 'text/html')
-                    email_message.send(fail_silently=False)
+                    enqueue_email(subject, message_text, [owner_email], html_message=message_html)
                 except Exception:
                     messages.warning(request, 'Termin je zakazan, ali slanje email obaveštenja nije uspelo.')
 
@@ -109,9 +128,42 @@ def booking_form(request, salon_name):
     return render(request, 'customers/appointment_form.html', context)
 
 
+def _available_slots_etag(request, salon_name):
+    if not _is_customer(request):
+        return None
+
+    salon_id = Salon.objects.filter(
+        name=salon_name,
+        is_approved=True,
+        is_active=True
+    ).values_list('id', flat=True).first()
+    return get_availability_etag(salon_id, request.GET.get('date'))
+
+
+def _get_requested_service(request, salon):
+    """
+    Usluga iz ?service= parametra. Vraća (service, None), (None, None) ako
+    parametar nije zadat, ili (None, JsonResponse) za nepostojeću uslugu.
+    """
+    service_id = request.GET.get('service')
+    if not service_id:
+        return None, None
+
+    service = None
+    if service_id.isdigit():
+        service = Service.objects.filter(id=service_id, salon=salon).only('id', 'duration').first()
+
+    if service is None:
+        return None, JsonResponse({'error': 'Nepostojeća usluga.'}, status=400)
+
+    return service, None
+
+
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_available_slots_etag)
 def available_slots(request, salon_name):
-    if not _is_customer(request.user):
+    if not _is_customer(request):
         return JsonResponse({'error': 'Nemate dozvolu.'}, status=403)
 
     salon = get_object_or_404(Salon, name=salon_name, is_approved=True, is_active=True)
@@ -125,30 +177,150 @@ def available_slots(request, salon_name):
     except ValueError:
         return JsonResponse({'error': 'Neispravan format datuma.'}, status=400)
 
-    generate_time_slots_for_date(salon, target_date)
+    service, service_error = _get_requested_service(request, salon)
+    if service_error:
+        return service_error
+
+    slots = get_free_slots(salon, target_date, duration=service.duration if service else None)
+    return JsonResponse({'slots': _serialize_free_slots(slots)})
 
-    slots = TimeSlot.objects.filter(
-        salon=salon,
-        date=target_date,
-        status='dostupan',
-        appointment__isnull=True
-    ).order_by('begin_time')
 
-    slots_data = [
+def _serialize_free_slots(slots):
+    return [
         {
-            'id': slot.id,
-            'label': f"{slot.begin_time.strftime('%H:%M')} - {slot.end_time.strftime('%H:%M')}"
+            'id': slot['id'],
+            'begin_time': slot['begin_time'].strftime('%H:%M'),
+            'label': f"{slot['begin_time'].strftime('%H:%M')} - {slot['end_time'].strftime('%H:%M')}"
         }
         for slot in slots
     ]
 
-    return JsonResponse({'slots': slots_data})
+
+async def _aavailable_slots_etag(request, salon_name):
+    if not await _ais_customer(request):
+        return None
+
+    salon_id = await Salon.objects.filter(
+        name=salon_name,
+        is_approved=True,
+        is_active=True
+    ).values_list('id', flat=True).afirst()
+    return await aget_availability_etag(salon_id, request.GET.get('date'))
+
+
+async def _aget_requested_service(request, salon):
+    """Async varijanta _get_requested_service"""
+    service_id = request.GET.get('service')
+    if not service_id:
+        return None, None
+
+    service = None
+    if service_id.isdigit():
+        service = await Service.objects.filter(id=service_id, salon=salon).only('id', 'duration').afirst()
+
+    if service is None:
+        return None, JsonResponse({'error': 'Nepostojeća usluga.'}, status=400)
+
+    return service, None
+
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@async_condition(etag_func=_aavailable_slots_etag)
+async def available_slots_async(request, salon_name):
+    """
+    Async (ASGI) varijanta available_slots sa istim odgovorom i ETag-om.
+    Koristi se kada je ASYNC_AVAILABILITY_VIEWS uključen.
+    """
+    if not await _ais_customer(request):
+        return JsonResponse({'error': 'Nemate dozvolu.'}, status=403)
+
+    salon = await aget_object_or_404(Salon, name=salon_name, is_approved=True, is_active=True)
+    date_str = request.GET.get('date')
+
+    if not date_str:
+        return JsonResponse({'error': 'Datum je obavezan.'}, status=400)
+
+    try:
+        target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        return JsonResponse({'error': 'Neispravan format datuma.'}, status=400)
+
+    service, service_error = await _aget_requested_service(request, salon)
+    if service_error:
+        return service_error
+
+    slots = await aget_free_slots(salon, target_date, duration=service.duration if service else None)
+    return JsonResponse({'slots': _serialize_free_slots(slots)})
+
+
+AVAILABILITY_RANGE_MAX_DAYS = 31
+
+
+@login_required
+def available_slots_range(request, salon_name):
+    """
+    Dostupnost za period (?from=&to=) jednim zahtevom, za kalendarske prikaze.
+    Po danu vraća broj slobodnih slotova i bitmapu mreže ('1' = slobodan);
+    liste slotova samo uz ?slots=1. Uz ?service= slobodni su samo slotovi
+    u kojima usluga može da počne.
+    """
+    if not _is_customer(request):
+        return JsonResponse({'error': 'Nemate dozvolu.'}, status=403)
+
+    salon = get_object_or_404(Salon, name=salon_name, is_approved=True, is_active=True)
+
+    try:
+        start_date = datetime.strptime(request.GET.get('from', ''), '%Y-%m-%d').date()
+        end_date = datetime.strptime(request.GET.get('to', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return JsonResponse({'error': 'Neispravan format datuma.'}, status=400)
+
+    if end_date < start_date or (end_date - start_date).days >= AVAILABILITY_RANGE_MAX_DAYS:
+        return JsonResponse(
+            {'error': f'Period mora biti između 1 i {AVAILABILITY_RANGE_MAX_DAYS} dana.'},
+            status=400
+        )
+
+    service, service_error = _get_requested_service(request, salon)
+    if service_error:
+        return service_error
+
+    include_slots = request.GET.get('slots') == '1'
+
+    days_data = []
+    for slot_date, day_map in get_range_maps(salon, start_date, end_date):
+        free_bits = day_map.startable(service.duration if service else None)
+        day_data = {
+            'date': slot_date.isoformat(),
+            'start': day_map.opening_time.strftime('%H:%M') if day_map.size else None,
+            # Dan sa terminima može ostati na ranijem intervalu
+            'interval': day_map.slot_minutes,
+            'free': bin(free_bits).count('1'),
+            'bitmap': day_map.bitmap_string(free_bits),
+        }
+
+        if include_slots:
+            day_data['slots'] = [
+                {
+                    'begin_time': slot['begin_time'].strftime('%H:%M'),
+                    'label': f"{slot['begin_time'].strftime('%H:%M')} - {slot['end_time'].strftime('%H:%M')}"
+                }
+                for slot in day_map.slots_for(free_bits)
+            ]
+
+        days_data.append(day_data)
+
+    return JsonResponse({
+        'interval': salon.slot_interval_minutes,
+        'days': days_data,
+    })
 
 
 @login_required
 def my_appointments(request):
     """Prikaži sve termine korisnika (prethodne i buduće)"""
-    if not _is_customer(request.user):
+    if not _is_customer(request):
         messages.error(request, 'Samo mušterije mogu pristupiti svojim terminima.')
         return redirect('redirect_after_login')
 
@@ -158,7 +330,7 @@ def my_appointments(request):
     appointments = Appointment.objects.filter(
         customer=request.user
     ).select_related('time_slot', 'service', 'salon').order_by(
-        '-time_slot__date', '-time_slot__begin_time'
+        '-date', '-begin_time'
     )
     
     # Razdvoji na buduće i prethodne
@@ -0,0 +1,35 @@
+"""
+ASGI profil: gunicorn upravlja procesima, a svaki worker je uvicorn event loop.
+
+    gunicorn sistem_zakazivanja.asgi:application -c gunicorn_asgi.conf.py
+
+Uključuje async varijante available_slots i get_slots_for_date. Polling
+izbora datuma tada ne drži nit po zahtevu dok čeka na bazu ili cache.
+
+Persistentne konekcije (CONN_MAX_AGE) se pod ASGI-jem ne dele između zahteva,
+pa se ovde isključuju; za ponovno korišćenje konekcija uključiti DB_POOL=True.
+WhiteNoise je sync middleware i isključen je; statiku (collectstatic u
+STATIC_ROOT) služi reverse proxy.
+
+Uključuje i SSE promene slotova (salons:slot_events). Sa više worker-a
+postaviti SLOT_EVENTS_BROKER=salons.events.PostgresNotifyBroker, jer
+podrazumevani broker ne prenosi događaje između procesa. Sa više worker-a
+cache mora biti deljen (CACHE_BACKEND, npr. Redis).
+"""
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+worker_class = 'uvicorn_worker.UvicornWorker'
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+raw_env = [
+    # Da provere (deljeni cache, konekcije) vide stvaran broj worker-a
+    f'WEB_CONCURRENCY={workers}',
+    'ASYNC_AVAILABILITY_VIEWS=True',
+    'SLOT_EVENTS_ENABLED=True',
+    'WHITENOISE_ENABLED=False',
+    'DB_CONN_MAX_AGE=0',
+]
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from .models import Salon, Service, SalonWorkingHours, TimeSlot, Appointment
-from sistem_zakazivanja.models import UserProfile
+from sistem_zakazivanja.models import UserProfile, OutboundEmail
 
 admin.site.register(Salon)
 admin.site.register(Service)
@@ -8,4 +8,5 @@ admin.site.register(SalonWorkingHours)
 admin.site.register(TimeSlot)
 admin.site.register(Appointment)
 
-admin.site.register(UserProfile)
\ No newline at end of file
+admin.site.register(UserProfile)
+admin.site.register(OutboundEmail)
@@ -0,0 +1,318 @@
+from datetime import datetime, time, timedelta
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from .daymap import DaySlotMap
+from .models import SalonWorkingHours, TimeSlot, Appointment
+from .occupancy import DayOccupancy
+from .utils import get_day_key, build_day_grid, get_working_hours_by_day
+from .versions import aget_availability_version, get_availability_version
+
+
+DAY_MAP_CACHE_TIMEOUT = 60 * 10
+# Menja se kada se promeni oblik DaySlotMap, da se ne čitaju stare mape iz cache-a
+DAY_MAP_CACHE_FORMAT = 2
+DAY_MAP_STATS_KEYS = {
+    'hits': 'day_map:stats:hits',
+    'misses': 'day_map:stats:misses',
+}
+
+
+def get_availability_etag(salon_id, date_str):
+    """
+    ETag za dostupnost dana; None (bez uslovnog odgovora) ako salon nije
+    poznat ili datum nije validan, pa view sam vraća grešku.
+    """
+    if salon_id is None:
+        return None
+
+    try:
+        target_date = datetime.strptime(date_str or '', '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+    return get_availability_version(salon_id, target_date)
+
+
+async def aget_availability_etag(salon_id, date_str):
+    """Async varijanta get_availability_etag"""
+    if salon_id is None:
+        return None
+
+    try:
+        target_date = datetime.strptime(date_str or '', '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+    return await aget_availability_version(salon_id, target_date)
+
+
+def get_day_grid(salon, target_date):
+    """
+    Računa virtuelnu mrežu slotova za dan iz radnog vremena i intervala salona.
+    Vraća listu (begin_time, end_time) parova; prazna lista ako salon ne radi.
+    """
+    working_hours = SalonWorkingHours.objects.filter(
+        salon=salon,
+        day=get_day_key(target_date),
+        is_working=True
+    ).first()
+
+    if not working_hours:
+        return []
+
+    slot_minutes = getattr(salon, 'slot_interval_minutes', 30) or 30
+    return build_day_grid(target_date, working_hours.opening_time, working_hours.closing_time, slot_minutes)
+
+
+def load_day_occupancy(salon, target_date, exclude_appointment_id=None):
+    """Učitava sve termine dana jednim upitom i gradi DayOccupancy"""
+    appointments = Appointment.objects.select_related('time_slot', 'service').filter(
+        salon=salon,
+        date=target_date
+    )
+    return DayOccupancy.from_appointments(
+        target_date,
+        appointments,
+        exclude_appointment_id=exclude_appointment_id
+    )
+
+
+SLOT_ROW_FIELDS = (
+    'id', 'date', 'begin_time', 'end_time', 'status',
+    'appointment__id', 'appointment__status', 'appointment__service__duration',
+)
+
+
+def _empty_day_maps(salon, start_date, end_date, working_hours):
+    slot_minutes = getattr(salon, 'slot_interval_minutes', 30) or 30
+
+    day_maps = {}
+    current_date = start_date
+    while current_date <= end_date:
+        opening_time, closing_time = working_hours.get(get_day_key(current_date), (time(0, 0), time(0, 0)))
+        day_maps[current_date] = DaySlotMap(current_date, opening_time, closing_time, slot_minutes)
+        current_date += timedelta(days=1)
+    return day_maps
+
+
+def _slot_rows(salon, start_date, end_date):
+    return TimeSlot.objects.filter(
+        salon=salon,
+        date__range=(start_date, end_date)
+    ).values_list(*SLOT_ROW_FIELDS)
+
+
+def _fill_day_maps(day_maps, rows):
+    rows = list(rows)
+
+    # Dan čiji slotovi nisu na tekućoj mreži (interval promenjen posle
+    # zakazivanja) prikazuje se na mreži sačuvanih slotova
+    slot_times = {}
+    for _, slot_date, begin_time, end_time, *_ in rows:
+        slot_times.setdefault(slot_date, []).append((begin_time, end_time))
+    for slot_date, times in slot_times.items():
+        day_map = day_maps[slot_date]
+        if not all(day_map.fits(begin_time, end_time) for begin_time, end_time in times):
+            day_maps[slot_date] = day_map.with_slots(times)
+
+    for slot_id, slot_date, begin_time, end_time, status, appointment_id, appointment_status, duration in rows:
+        day_map = day_maps[slot_date]
+        day_map.add_slot(slot_id, begin_time, status, has_appointment=appointment_id is not None, end_time=end_time)
+
+        if appointment_id is not None and appointment_status != 'otkazano':
+            if not duration:
+                duration = (
+                    datetime.combine(slot_date, end_time) - datetime.combine(slot_date, begin_time)
+                ).seconds // 60 or 30
+            day_map.add_busy_range(begin_time, duration)
+
+    return day_maps
+
+
+def build_day_maps(salon, start_date, end_date):
+    """
+    Gradi DaySlotMap za svaki dan perioda [start_date, end_date]. Stanje svih
+    slotova i termina perioda dolazi iz jednog values_list upita (slot ->
+    termin -> usluga join), a radno vreme iz još jednog.
+    Vraća {date: DaySlotMap}; neradni dani imaju praznu mapu.
+    """
+    day_maps = _empty_day_maps(salon, start_date, end_date, get_working_hours_by_day(salon))
+    return _fill_day_maps(day_maps, _slot_rows(salon, start_date, end_date))
+
+
+async def abuild_day_maps(salon, start_date, end_date):
+    """Async varijanta build_day_maps: isti upiti kroz async ORM"""
+    working_hours = {
+        item.day: (item.opening_time, item.closing_time)
+        async for item in SalonWorkingHours.objects.filter(salon=salon, is_working=True).aiterator()
+    }
+    day_maps = _empty_day_maps(salon, start_date, end_date, working_hours)
+    # values_list().aiterator() u Django 5.2 izvršava upit sinhrono (ValuesListIterable),
+    # pa se redovi dohvataju sa async for nad QuerySet-om (ceo rezultat u niti ORM-a)
+    rows = [row async for row in _slot_rows(salon, start_date, end_date)]
+    return _fill_day_maps(day_maps, rows)
+
+
+def _day_map_cache_key(salon_id, target_date, version):
+    return f'day_map:{DAY_MAP_CACHE_FORMAT}:{salon_id}:{target_date.isoformat()}:{version}'
+
+
+def load_day_map(salon, target_date):
+    """
+    DaySlotMap jednog dana iz cache-a. Ključ sadrži verziju dostupnosti
+    (salons.versions), pa svaka izmena slota, termina ili radnog vremena
+    automatski daje novi ključ.
+    """
+    cache_key = _day_map_cache_key(salon.id, target_date, get_availability_version(salon.id, target_date))
+
+    day_map = cache.get(cache_key)
+    if day_map is None:
+        _count_day_map('misses')
+        day_map = build_day_maps(salon, target_date, target_date)[target_date]
+        cache.set(cache_key, day_map, DAY_MAP_CACHE_TIMEOUT)
+    else:
+        _count_day_map('hits')
+    return day_map
+
+
+async def aload_day_map(salon, target_date):
+    """Async varijanta load_day_map; deli isti cache ključ i brojače"""
+    version = await aget_availability_version(salon.id, target_date)
+    cache_key = _day_map_cache_key(salon.id, target_date, version)
+
+    day_map = await cache.aget(cache_key)
+    if day_map is None:
+        await _acount_day_map('misses')
+        day_map = (await abuild_day_maps(salon, target_date, target_date))[target_date]
+        await cache.aset(cache_key, day_map, DAY_MAP_CACHE_TIMEOUT)
+    else:
+        await _acount_day_map('hits')
+    return day_map
+
+
+def _count_day_map(name):
+    key = DAY_MAP_STATS_KEYS[name]
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+async def _acount_day_map(name):
+    key = DAY_MAP_STATS_KEYS[name]
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        if not await cache.aadd(key, 1, None):
+            await cache.aincr(key)
+
+
+def get_day_map_cache_stats():
+    """
+    Brojači pogodaka i promašaja cache-a dnevnih mapa. Čuvaju se u default
+    cache-u, pa su zajednički za sve procese samo uz deljeni cache (Redis,
+    Memcached); sa LocMemCache svaki proces broji samo svoje zahteve.
+    """
+    stats = {name: cache.get(key) or 0 for name, key in DAY_MAP_STATS_KEYS.items()}
+    total = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = stats['hits'] / total if total else 0.0
+    return stats
+
+
+def reset_day_map_cache_stats():
+    cache.delete_many(list(DAY_MAP_STATS_KEYS.values()))
+
+
+def get_day_view(salon, target_date):
+    """
+    Read-only pregled jednog dana: virtuelna mreža slotova preklopljena sa
+    postojećim TimeSlot i Appointment redovima. Ne kreira ništa u bazi.
+
+    Vraća listu rečnika sortiranu po begin_time:
+        id              - id TimeSlot reda ili None ako slot još nije kreiran
+        begin_time      - datetime.time
+        end_time        - datetime.time
+        status          - efektivni status ('dostupan', 'zauzet', 'blokiran')
+        has_appointment - da li je slot vezan za termin ili ga termin pokriva
+    """
+    return load_day_map(salon, target_date).to_day_view()
+
+
+def get_free_slots(salon, target_date, duration=None):
+    """
+    Slobodni slotovi dana (dostupni i bez termina), bez pisanja u bazu.
+    Uz duration (minuti usluge) vraćaju se samo početni slotovi iza kojih
+    ima dovoljno uzastopnih slobodnih slotova.
+    """
+    day_map = load_day_map(salon, target_date)
+    return day_map.slots_for(day_map.startable(duration))
+
+
+async def aget_day_view(salon, target_date):
+    return (await aload_day_map(salon, target_date)).to_day_view()
+
+
+async def aget_free_slots(salon, target_date, duration=None):
+    day_map = await aload_day_map(salon, target_date)
+    return day_map.slots_for(day_map.startable(duration))
+
+
+def get_range_maps(salon, start_date, end_date):
+    """DaySlotMap za svaki dan perioda, kao lista (date, DaySlotMap) sortirana po datumu"""
+    return sorted(build_day_maps(salon, start_date, end_date).items())
+
+
+def is_slot_startable(salon, target_date, begin_time, duration=None):
+    """
+    Brza provera iz keširane mape dana da li termin (uz uslugu od `duration`
+    minuta) može da počne u begin_time. Konačnu proveru radi Appointment.save.
+    """
+    day_map = load_day_map(salon, target_date)
+    index = day_map.index_of(begin_time)
+    if index is None:
+        return False
+
+    free_bits = day_map.startable(duration)
+    return bool(free_bits >> index & 1)
+
+
+def get_or_create_slot(salon, target_date, begin_time):
+    """
+    Vraća TimeSlot za dati početak, kreirajući red tek kada je potreban
+    (zakazivanje ili blokiranje). Početak mora biti na mreži radnog vremena.
+    """
+    day_map = load_day_map(salon, target_date)
+    index = day_map.index_of(begin_time)
+    if index is None or day_map.inner >> index & 1:
+        raise ValidationError('Izabrani termin ne postoji.')
+
+    slot, _ = TimeSlot.objects.get_or_create(
+        salon=salon,
+        date=target_date,
+        begin_time=begin_time,
+        defaults={
+            'end_time': day_map.times_at(index)[1],
+            'status': 'dostupan'
+        }
+    )
+    return slot
+
+
+def book_appointment(salon, target_date, begin_time, customer, service, notes=''):
+    """
+    Zakazuje termin na isti način za sve pozivaoce: get_or_create_slot pa
+    Appointment.save, koji u transakciji zaključava slotove i proverava preklapanja.
+    """
+    slot = get_or_create_slot(salon, target_date, begin_time)
+    if slot.status != 'dostupan':
+        raise ValidationError('Izabrani termin više nije dostupan. Izaberite drugi.')
+
+    return Appointment.objects.create(
+        salon=salon,
+        time_slot=slot,
+        customer=customer,
+        service=service,
+        notes=notes,
+        status='na čekanju'
+    )
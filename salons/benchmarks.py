@@ -0,0 +1,179 @@
+from datetime import date, time, timedelta
+import math
+import random
+import statistics
+import subprocess
+import time as clock
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from sistem_zakazivanja.models import UserProfile
+from .models import Salon, Service, SalonWorkingHours
+from .utils import DEFAULT_WORKING_HOURS
+
+
+BENCHMARK_PREFIX = 'bench'
+
+# Realistični profili: (radni dani od-do, subota od-do ili None, interval)
+WORKING_PROFILES = [
+    ((time(9, 0), time(17, 0)), None, 30),
+    ((time(8, 0), time(20, 0)), (time(9, 0), time(14, 0)), 30),
+    ((time(10, 0), time(18, 0)), (time(10, 0), time(15, 0)), 15),
+    ((time(7, 0), time(15, 0)), None, 60),
+]
+
+SERVICE_PROFILES = [
+    ('Šišanje', 30, 1200),
+    ('Brijanje', 15, 600),
+    ('Šišanje i brada', 45, 1700),
+    ('Farbanje', 90, 3500),
+]
+
+
+def seed_benchmark_data(salon_count, customer_count, prefix=BENCHMARK_PREFIX, seed=0, all_services=False):
+    """
+    Kreira odobrene salone sa radnim vremenom i uslugama, vlasnike i mušterije.
+    Uz all_services svaki salon dobija sve usluge iz SERVICE_PROFILES.
+    Korisnici nemaju email, pa se ništa ne upisuje u outbox.
+    Svi redovi nose prefiks i brišu se sa cleanup_benchmark_data.
+    """
+    rng = random.Random(seed)
+    salons = []
+
+    for index in range(salon_count):
+        owner = _create_user(f'{prefix}-owner-{index}', 'frizer')
+        (weekday_open, weekday_close), saturday, interval = WORKING_PROFILES[index % len(WORKING_PROFILES)]
+
+        salon = Salon.objects.create(
+            owner=owner,
+            name=f'{prefix}-salon-{index}',
+            description=f'{prefix} salon {index}',
+            address=f'{prefix} adresa {index}',
+            phone=f'{prefix}-{index}',
+            is_approved=True,
+            is_active=True,
+            slot_interval_minutes=interval,
+        )
+
+        working_hours = []
+        for day in DEFAULT_WORKING_HOURS:
+            is_working, opening, closing = day not in ('subota', 'nedelja'), weekday_open, weekday_close
+            if day == 'subota' and saturday:
+                is_working, (opening, closing) = True, saturday
+            working_hours.append(SalonWorkingHours(
+                salon=salon, day=day, is_working=is_working, opening_time=opening, closing_time=closing
+            ))
+        SalonWorkingHours.objects.bulk_create(working_hours)
+
+        service_profiles = SERVICE_PROFILES if all_services else rng.sample(
+            SERVICE_PROFILES, k=rng.randint(2, len(SERVICE_PROFILES))
+        )
+        services = [
+            Service.objects.create(
+                salon=salon,
+                name=f'{name} ({prefix} {index})',
+                description=name,
+                price=price,
+                duration=duration,
+            )
+            for name, duration, price in service_profiles
+        ]
+        salons.append({'salon': salon, 'owner': owner, 'services': services})
+
+    customers = [_create_user(f'{prefix}-customer-{index}', 'musterija') for index in range(customer_count)]
+    return salons, customers
+
+
+def _create_user(username, role):
+    user = User.objects.create_user(username, '', 'benchmark-password')
+    UserProfile.objects.filter(user=user).update(role=role, email_verified=True)
+    return user
+
+
+def cleanup_benchmark_data(prefix=BENCHMARK_PREFIX):
+    """Briše korisnike sa prefiksom; saloni, slotovi i termini idu kaskadno"""
+    deleted, _ = User.objects.filter(username__startswith=f'{prefix}-').delete()
+    return deleted
+
+
+def next_working_dates(salon, count, start=None):
+    """Prvih `count` radnih dana salona od sutra (ili od start)"""
+    working_days = set(
+        SalonWorkingHours.objects.filter(salon=salon, is_working=True).values_list('day', flat=True)
+    )
+    current = start or date.today() + timedelta(days=1)
+    dates = []
+    while len(dates) < count:
+        if SalonWorkingHours.DAYS[current.weekday()][0] in working_days:
+            dates.append(current)
+        current += timedelta(days=1)
+    return dates
+
+
+class Measurement:
+    """Skuplja latenciju i broj upita po pozivu i sažima ih u p50/p95/throughput"""
+
+    def __init__(self, name):
+        self.name = name
+        self.latencies_ms = []
+        self.query_counts = []
+        self.errors = 0
+        self.wall_seconds = 0.0
+
+    def measure(self, func, *args, **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            started = clock.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                self.errors += 1
+                raise
+            finally:
+                self.latencies_ms.append((clock.perf_counter() - started) * 1000)
+                self.query_counts.append(len(queries))
+
+    def merge(self, other):
+        self.latencies_ms.extend(other.latencies_ms)
+        self.query_counts.extend(other.query_counts)
+        self.errors += other.errors
+
+    def summary(self):
+        count = len(self.latencies_ms)
+        latencies = sorted(self.latencies_ms)
+        wall_seconds = self.wall_seconds or sum(latencies) / 1000
+        return {
+            'count': count,
+            'errors': self.errors,
+            'queries_avg': round(statistics.mean(self.query_counts), 2) if count else 0,
+            'queries_max': max(self.query_counts) if count else 0,
+            'latency_ms_mean': round(statistics.mean(latencies), 3) if count else 0,
+            'latency_ms_p50': round(percentile(latencies, 50), 3),
+            'latency_ms_p95': round(percentile(latencies, 95), 3),
+            'throughput_per_s': round(count / wall_seconds, 2) if wall_seconds else 0,
+        }
+
+
+def percentile(sorted_values, percent):
+    if not sorted_values:
+        return 0
+    index = max(math.ceil(len(sorted_values) * percent / 100) - 1, 0)
+    return sorted_values[index]
+
+
+def get_run_metadata():
+    """Podaci o okruženju koji idu uz rezultate, za poređenje između commit-ova"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'commit': commit,
+        'started_at': clock.strftime('%Y-%m-%dT%H:%M:%S'),
+        'db_vendor': connection.vendor,
+        'cache_backend': settings.CACHES['default']['BACKEND'],
+    }
@@ -0,0 +1,176 @@
+from datetime import datetime, timedelta
+from functools import reduce
+import math
+
+
+class DaySlotMap:
+    """
+    Kompaktno stanje jednog dana salona: bit i odgovara slotu koji počinje
+    i * slot_minutes posle otvaranja. Stanja se čuvaju kao int bitmape, pa se
+    provere slobodnih slotova i traženje uzastopnih nizova za uslugu rade
+    bitovskim operacijama umesto nad TimeSlot objektima.
+
+        covered  - slot pokriva aktivan termin
+        reserved - slot je u bazi označen kao 'zauzet'
+        blocked  - slot je blokiran
+        booked   - slot je direktno vezan za termin (i otkazan)
+        inner    - nastavak sačuvanog slota dužeg od jedne ćelije (u njemu se
+                   ne može početi)
+
+    Dan čiji sačuvani slotovi nisu na tekućoj mreži (npr. dan sa terminima
+    preskočen pri promeni intervala) dobija mrežu iz samih slotova (with_slots).
+    """
+
+    __slots__ = (
+        'date', 'opening_time', 'slot_minutes', 'size',
+        'slot_ids', 'covered', 'reserved', 'blocked', 'booked', 'inner',
+    )
+
+    def __init__(self, target_date, opening_time, closing_time, slot_minutes):
+        self.date = target_date
+        self.opening_time = opening_time
+        self.slot_minutes = slot_minutes
+
+        day_minutes = _minutes(closing_time) - _minutes(opening_time)
+        self.size = max(day_minutes // slot_minutes, 0)
+        self.slot_ids = [None] * self.size
+        self.covered = 0
+        self.reserved = 0
+        self.blocked = 0
+        self.booked = 0
+        self.inner = 0
+
+    @property
+    def full_mask(self):
+        return (1 << self.size) - 1
+
+    @property
+    def free(self):
+        return self.full_mask & ~(self.covered | self.reserved | self.blocked | self.booked)
+
+    def index_of(self, begin_time):
+        """Indeks slota na mreži ili None ako vreme nije na mreži dana"""
+        offset = _minutes(begin_time) - _minutes(self.opening_time)
+        if offset < 0 or offset % self.slot_minutes:
+            return None
+
+        index = offset // self.slot_minutes
+        return index if index < self.size else None
+
+    def times_at(self, index):
+        start = datetime.combine(self.date, self.opening_time) + timedelta(minutes=self.slot_minutes * index)
+        return start.time(), (start + timedelta(minutes=self.slot_minutes)).time()
+
+    def fits(self, begin_time, end_time):
+        """Da li je sačuvani slot tačno jedna ćelija ove mreže"""
+        return (
+            self.index_of(begin_time) is not None
+            and _minutes(end_time) - _minutes(begin_time) == self.slot_minutes
+        )
+
+    def with_slots(self, slot_times):
+        """
+        Nova prazna mapa dana na mreži sačuvanih slotova: ćelija je najveći
+        zajednički delilac njihovih trajanja i pomaka, a dan se po potrebi
+        proširuje da obuhvati sve slotove. Ćelije bez slota ostaju virtuelne.
+        """
+        starts = [_minutes(begin_time) for begin_time, _ in slot_times]
+        ends = [_minutes(end_time) for _, end_time in slot_times]
+        if self.size:
+            starts.append(_minutes(self.opening_time))
+            ends.append(_minutes(self.opening_time) + self.size * self.slot_minutes)
+        opening, closing = min(starts), max(ends)
+
+        slot_minutes = reduce(math.gcd, (
+            value
+            for begin_time, end_time in slot_times
+            for value in (_minutes(end_time) - _minutes(begin_time), _minutes(begin_time) - opening)
+        ), 0) or self.slot_minutes
+
+        return DaySlotMap(self.date, _time(self.date, opening), _time(self.date, closing), slot_minutes)
+
+    def add_slot(self, slot_id, begin_time, status, has_appointment, end_time=None):
+        index = self.index_of(begin_time)
+        if index is None:
+            return
+
+        span = 1
+        if end_time is not None:
+            span = max((_minutes(end_time) - _minutes(begin_time)) // self.slot_minutes, 1)
+        span = min(span, self.size - index)
+
+        bits = ((1 << span) - 1) << index
+        self.slot_ids[index] = slot_id
+        self.inner |= bits & ~(1 << index)
+        if status == 'zauzet':
+            self.reserved |= bits
+        elif status == 'blokiran':
+            self.blocked |= bits
+        if has_appointment:
+            self.booked |= bits
+
+    def add_busy_range(self, begin_time, minutes):
+        """Označava slotove koje preklapa interval [begin_time, begin_time + minutes)"""
+        start = _minutes(begin_time) - _minutes(self.opening_time)
+        first = max(start // self.slot_minutes, 0)
+        last = min(math.ceil((start + minutes) / self.slot_minutes), self.size)
+        if last > first:
+            self.covered |= ((1 << (last - first)) - 1) << first
+
+    def startable(self, duration=None):
+        """
+        Bitmapa slotova u kojima usluga od `duration` minuta može da počne;
+        bez trajanja slobodni slotovi u kojima se može početi.
+        """
+        required = max(math.ceil(duration / self.slot_minutes), 1) if duration else 1
+        free = self.free
+        bits = free
+        for shift in range(1, required):
+            bits &= free >> shift
+        return bits & ~self.inner
+
+    def status_at(self, index):
+        bit = 1 << index
+        if (self.covered | self.reserved) & bit:
+            return 'zauzet'
+        if self.blocked & bit:
+            return 'blokiran'
+        return 'dostupan'
+
+    def to_day_view(self):
+        """Serijalizacija u listu rečnika istog oblika kao ranije (get_day_view)"""
+        day_view = []
+        for index in range(self.size):
+            bit = 1 << index
+            if self.inner & bit:
+                continue
+
+            span = 1
+            while index + span < self.size and self.inner >> (index + span) & 1:
+                span += 1
+            begin_time = self.times_at(index)[0]
+            end_time = self.times_at(index + span - 1)[1]
+            day_view.append({
+                'id': self.slot_ids[index],
+                'begin_time': begin_time,
+                'end_time': end_time,
+                'status': self.status_at(index),
+                'has_appointment': bool((self.covered | self.booked) & bit),
+            })
+        return day_view
+
+    def slots_for(self, bits):
+        """Lista rečnika za slotove čiji je bit postavljen"""
+        return [slot for slot in self.to_day_view() if bits >> self.index_of(slot['begin_time']) & 1]
+
+    def bitmap_string(self, bits):
+        """Bitmapa kao niz '0'/'1' po redosledu slotova (JSON-prijateljski)"""
+        return ''.join('1' if bits >> index & 1 else '0' for index in range(self.size))
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def _time(target_date, minutes):
+    return (datetime.combine(target_date, datetime.min.time()) + timedelta(minutes=minutes)).time()
@@ -0,0 +1,179 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+SLOT_EVENTS_CHANNEL = 'slot_changes'
+SLOT_EVENTS_QUEUE_SIZE = 100
+SALON_WIDE = 'salon'
+
+
+class Subscription:
+    """Red događaja jednog SSE klijenta; živi u event loop-u koji ga je napravio"""
+
+    def __init__(self, salon_id):
+        self.salon_id = salon_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=SLOT_EVENTS_QUEUE_SIZE)
+
+    def put(self, date_key):
+        try:
+            self.queue.put_nowait(date_key)
+        except asyncio.QueueFull:
+            # Klijent ne stiže da čita; jedna oznaka za ceo salon je dovoljna
+            # da sledeće slanje bude pun snimak dana
+            self._drain()
+            self.queue.put_nowait(SALON_WIDE)
+
+    async def get(self, timeout):
+        """Promenjeni datumi ('YYYY-MM-DD' ili SALON_WIDE), spojeni u skup"""
+        first = await asyncio.wait_for(self.queue.get(), timeout)
+        return {first, *self._drain()}
+
+    def _drain(self):
+        keys = []
+        while not self.queue.empty():
+            keys.append(self.queue.get_nowait())
+        return keys
+
+
+class InProcessBroker:
+    """
+    Prosleđuje promene dostupnosti SSE klijentima istog procesa. Dovoljan za
+    jedan ASGI worker (lokalni razvoj); sa više procesa promena iz jednog ne
+    stiže do klijenata drugog - tada se koristi PostgresNotifyBroker.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+
+    def subscribe(self, salon_id):
+        subscription = Subscription(salon_id)
+        with self._lock:
+            self._subscriptions.setdefault(salon_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.salon_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.salon_id, None)
+
+    def publish(self, salon_id, date_key):
+        self.dispatch(salon_id, date_key)
+
+    def dispatch(self, salon_id, date_key):
+        """Predaje promenu redovima pretplatnika; sme da se zove iz bilo koje niti"""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(salon_id, ()))
+
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, date_key)
+            except RuntimeError:
+                # Event loop klijenta je zatvoren
+                self.unsubscribe(subscription)
+
+
+class PostgresNotifyBroker(InProcessBroker):
+    """
+    Promene se šalju sa pg_notify, pa stižu do SSE klijenata u svim procesima.
+    Svaki proces sa pretplatnicima drži jednu LISTEN konekciju u pozadinskoj
+    niti i događaje prosleđuje lokalnim klijentima.
+    """
+
+    listen_timeout = 5
+    reconnect_delay = 2
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+
+    def publish(self, salon_id, date_key):
+        payload = json.dumps({'salon': salon_id, 'date': date_key})
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [SLOT_EVENTS_CHANNEL, payload])
+
+    def subscribe(self, salon_id):
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen_forever, name='slot-events-listener', daemon=True)
+                self._listener.start()
+        return super().subscribe(salon_id)
+
+    def _listen_forever(self):
+        while True:
+            try:
+                self._listen()
+            except Exception:
+                logger.exception('LISTEN konekcija za događaje slotova je prekinuta; ponovno povezivanje.')
+            time.sleep(self.reconnect_delay)
+
+    def _listen(self):
+        params = connection.get_connection_params()
+        listen_connection = connection.Database.connect(**params)
+        listen_connection.autocommit = True
+        try:
+            with listen_connection.cursor() as cursor:
+                cursor.execute(f'LISTEN {SLOT_EVENTS_CHANNEL}')
+
+            while True:
+                for payload in self._wait_for_notifies(listen_connection):
+                    try:
+                        event = json.loads(payload)
+                        self.dispatch(event['salon'], event['date'])
+                    except (ValueError, KeyError, TypeError):
+                        logger.warning('Neispravan događaj slotova: %r', payload)
+        finally:
+            listen_connection.close()
+
+    def _wait_for_notifies(self, listen_connection):
+        if hasattr(listen_connection, 'notifies') and callable(listen_connection.notifies):
+            # psycopg 3
+            return [notify.payload for notify in listen_connection.notifies(timeout=self.listen_timeout)]
+
+        # psycopg2
+        if select.select([listen_connection], [], [], self.listen_timeout) == ([], [], []):
+            return []
+        listen_connection.poll()
+        payloads = [notify.payload for notify in listen_connection.notifies]
+        listen_connection.notifies.clear()
+        return payloads
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(settings.SLOT_EVENTS_BROKER)()
+        return _broker
+
+
+def publish_availability_change(salon_id, target_date=None):
+    """
+    Javlja SSE klijentima salona da se dostupnost datuma promenila (bez datuma:
+    ceo salon, npr. radno vreme). Poziva se posle commit-a; greška brokera se
+    samo loguje jer je izmena već sačuvana.
+    """
+    if not getattr(settings, 'SLOT_EVENTS_ENABLED', False):
+        return
+
+    date_key = target_date.isoformat() if target_date else SALON_WIDE
+    try:
+        get_broker().publish(salon_id, date_key)
+    except Exception:
+        logger.exception('Slanje događaja slotova nije uspelo (salon_id=%s, datum=%s).', salon_id, date_key)
@@ -182,16 +182,13 @@ class SalonForm(forms.ModelForm):
         if image.content_type not in valid_types:
             raise forms.ValidationError('Nevalidan format slike. Koristite JPG, PNG ili WebP.')
 
+        # Veličina nije bitna - Salon.save samo odlaže upload u pending_image, a process_salon_images seče kvadrat i pravi varijante
         try:
-            uploaded_image = Image.open(image)
-            width, height = uploaded_image.size
+            Image.open(image).verify()
             image.seek(0)
-        except (UnidentifiedImageError, OSError, ValueError):
+        except (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError):
             raise forms.ValidationError('Datoteka nije validna slika.')
 
-        if (width, height) != (500, 500):
-            raise forms.ValidationError('Slika mora biti tačno 500x500 piksela.')
-        
         return image
     
     
@@ -0,0 +1,135 @@
+import hashlib
+import io
+import logging
+from PIL import Image, ImageOps
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from .models import Salon
+
+logger = logging.getLogger(__name__)
+
+
+SALON_IMAGE_WIDTHS = (320, 640, 960)
+SALON_IMAGE_FORMATS = {
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 6}),
+}
+SALON_IMAGE_DIR = 'salons'
+# Posle isteka preuzeta slika palog worker-a ponovo je dostupna za obradu
+SALON_IMAGE_CLAIM_TIMEOUT = 60 * 10
+
+
+def _square(image):
+    """Ispravlja orijentaciju iz EXIF-a i seče centralni kvadrat u RGB"""
+    image = ImageOps.exif_transpose(image)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    side = min(image.size)
+    left = (image.width - side) // 2
+    top = (image.height - side) // 2
+    return image.crop((left, top, left + side, top + side))
+
+
+def _encode(image, format_key):
+    pil_format, extension, save_options = SALON_IMAGE_FORMATS[format_key]
+    buffer = io.BytesIO()
+    # Bez exif= argumenta Pillow ne upisuje EXIF (lokacija, uređaj...)
+    image.save(buffer, pil_format, **save_options)
+    content = buffer.getvalue()
+    digest = hashlib.sha256(content).hexdigest()[:16]
+    return f'{SALON_IMAGE_DIR}/{digest}-{image.width}.{extension}', content
+
+
+def build_image_variants(source):
+    """
+    Od otpremljene slike bilo koje veličine pravi kvadratne varijante
+    SALON_IMAGE_WIDTHS (ne veće od originala) u JPEG i WebP formatu i upisuje
+    ih u storage pod imenima sa hešom sadržaja, pa se mogu keširati zauvek.
+
+    Vraća (glavna_slika, varijante) gde je glavna najveća JPEG varijanta, a
+    varijante {'jpeg': {'320': ime, ...}, 'webp': {...}}.
+    """
+    source.seek(0)
+    with Image.open(source) as uploaded:
+        square = _square(uploaded)
+
+    widths = sorted({width for width in SALON_IMAGE_WIDTHS if width <= square.width} or {square.width})
+    variants = {format_key: {} for format_key in SALON_IMAGE_FORMATS}
+
+    for width in widths:
+        resized = square if width == square.width else square.resize((width, width), Image.Resampling.LANCZOS)
+        for format_key in SALON_IMAGE_FORMATS:
+            name, content = _encode(resized, format_key)
+            if not default_storage.exists(name):
+                default_storage.save(name, ContentFile(content))
+            variants[format_key][str(width)] = name
+
+    return variants['jpeg'][str(widths[-1])], variants
+
+
+def process_salon_image(salon):
+    """Pravi varijante za postojeću sliku salona (npr. za stare salone)"""
+    with salon.image.open('rb') as source:
+        main_name, variants = build_image_variants(source)
+
+    salon.image = main_name
+    salon.image_variants = variants
+    salon.save(update_fields=['image', 'image_variants'])
+    return variants
+
+
+def _claim_pending_image(salon_id, staged_name):
+    """
+    Atomično preuzimanje slike iz staging-a (cache.add), da je ne obrađuje više
+    worker-a odjednom. Ime staging fajla je jedinstveno, pa se ključ ne
+    oslobađa nego ističe. Sa više procesa cache mora biti deljen (E001).
+    """
+    return cache.add(f'salon_image:claim:{salon_id}:{staged_name}', True, SALON_IMAGE_CLAIM_TIMEOUT)
+
+
+def process_next_pending_image():
+    """
+    Obrađuje sliku iz staging-a za jedan salon. Obrada ide van transakcije, a
+    red salona se zaključava samo za kratak upis rezultata - i to samo ako je
+    u staging-u i dalje ista slika (nova otpremljena slika ostaje za sledeći
+    prolaz). Vraća salon ili None kada ništa ne čeka obradu.
+    """
+    pending = Salon.objects.exclude(pending_image='').order_by('id').only('id', 'pending_image')
+
+    for salon in pending.iterator():
+        staged_name = salon.pending_image.name
+        if not _claim_pending_image(salon.pk, staged_name):
+            continue
+
+        processed = _apply_pending_image(salon, staged_name)
+        if processed is not None:
+            return processed
+
+    return None
+
+
+def _apply_pending_image(salon, staged_name):
+    update_fields = ['pending_image']
+    try:
+        with salon.pending_image.open('rb') as source:
+            image, image_variants = build_image_variants(source)
+        update_fields += ['image', 'image_variants']
+    except (OSError, ValueError, Image.DecompressionBombError) as error:
+        logger.warning('Neuspešna obrada slike salona (salon_id=%s): %s', salon.pk, error)
+
+    with transaction.atomic():
+        salon = Salon.objects.select_for_update().filter(pk=salon.pk, pending_image=staged_name).first()
+        if salon is None:
+            # U međuvremenu je otpremljena nova slika (stara je već obrisana)
+            return None
+
+        if 'image' in update_fields:
+            salon.image, salon.image_variants = image, image_variants
+        salon.pending_image = ''
+        salon.save(update_fields=update_fields)
+
+    default_storage.delete(staged_name)
+    return salon
@@ -0,0 +1,65 @@
+from .models import Appointment, TimeSlot
+from .occupancy import DayOccupancy
+
+
+def find_booking_violations(salon, start_date, end_date):
+    """
+    Proverava invarijante zakazivanja za salon u periodu [start_date, end_date]:
+
+        preklapanje          - dva aktivna termina pokrivaju isto vreme
+        zauzet_bez_termina   - slot je 'zauzet', a ne pokriva ga nijedan aktivan termin
+        pokriven_nije_zauzet - aktivan termin pokriva slot koji nije 'zauzet'
+
+    Vraća listu rečnika {'type', 'date', 'detail'}; prazna lista znači da je stanje ispravno.
+    """
+    appointments = Appointment.objects.select_related('time_slot', 'service').filter(
+        salon=salon,
+        date__range=(start_date, end_date)
+    ).exclude(status='otkazano')
+
+    intervals_by_date = {}
+    for appointment in appointments:
+        start, end, _, _ = appointment._get_time_range(appointment.time_slot, appointment.service)
+        intervals_by_date.setdefault(appointment.date, []).append((start, end, appointment))
+
+    violations = []
+    occupancy_by_date = {}
+
+    for target_date, intervals in intervals_by_date.items():
+        occupancy = DayOccupancy(target_date, intervals)
+        occupancy_by_date[target_date] = occupancy
+
+        latest = None
+        for start, end, appointment in occupancy.intervals:
+            if latest is not None and start < latest[1]:
+                violations.append({
+                    'type': 'preklapanje',
+                    'date': target_date.isoformat(),
+                    'detail': f'termin {appointment.pk} ({start:%H:%M}) preklapa termin {latest[2].pk} (do {latest[1]:%H:%M})',
+                })
+            if latest is None or end > latest[1]:
+                latest = (start, end, appointment)
+
+    slots = TimeSlot.objects.filter(
+        salon=salon,
+        date__range=(start_date, end_date)
+    ).values_list('id', 'date', 'begin_time', 'end_time', 'status')
+
+    for slot_id, slot_date, begin_time, end_time, status in slots:
+        occupancy = occupancy_by_date.get(slot_date)
+        busy = occupancy is not None and occupancy.is_busy(begin_time, end_time)
+
+        if status == 'zauzet' and not busy:
+            violations.append({
+                'type': 'zauzet_bez_termina',
+                'date': slot_date.isoformat(),
+                'detail': f'slot {slot_id} ({begin_time:%H:%M})',
+            })
+        elif busy and status != 'zauzet':
+            violations.append({
+                'type': 'pokriven_nije_zauzet',
+                'date': slot_date.isoformat(),
+                'detail': f'slot {slot_id} ({begin_time:%H:%M}) je {status}',
+            })
+
+    return violations
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from salons.availability import get_day_map_cache_stats, reset_day_map_cache_stats
+from sistem_zakazivanja.checks import PROCESS_LOCAL_CACHES
+
+
+class Command(BaseCommand):
+    help = (
+        'Prikazuje pogotke i promašaje cache-a dnevnih mapa dostupnosti. Traži deljeni '
+        'cache (Redis, Memcached); sa LocMemCache brojače vidi samo proces aplikacije, '
+        'na /metrics/views/.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Posle ispisa vrati brojače na nulu')
+
+    def handle(self, *args, **options):
+        backend = settings.CACHES['default']['BACKEND']
+        if backend in PROCESS_LOCAL_CACHES:
+            raise CommandError(
+                f'Default cache ({backend}) je lokalan za proces; ova komanda ne vidi brojače '
+                'worker-a. Koristite /metrics/views/ ili deljeni cache.'
+            )
+
+        stats = get_day_map_cache_stats()
+        self.stdout.write(
+            f"Pogoci: {stats['hits']}, promašaji: {stats['misses']}, "
+            f"procenat pogodaka: {stats['hit_ratio'] * 100:.1f}%"
+        )
+
+        if options['reset']:
+            reset_day_map_cache_stats()
+            self.stdout.write(self.style.SUCCESS('Brojači su resetovani.'))
@@ -0,0 +1,245 @@
+import asyncio
+import json
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import ThreadSensitiveContext
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import path
+from customers import views as customer_views
+from salons import views as salon_views
+from salons.benchmarks import (
+    cleanup_benchmark_data,
+    get_run_metadata,
+    next_working_dates,
+    percentile,
+    seed_benchmark_data,
+)
+from salons.models import Salon
+from salons.versions import bump_availability_version
+from sistem_zakazivanja import metrics
+
+
+ASYNC_BENCH_PREFIX = 'asyncbench'
+
+# Obe varijante istih endpoint-a jedna pored druge, nezavisno od
+# ASYNC_AVAILABILITY_VIEWS; komanda ih aktivira preko ROOT_URLCONF
+urlpatterns = [
+    path('wsgi/customers/<str:salon_name>/slobodni-termini/', customer_views.available_slots, name='wsgi_available_slots'),
+    path('asgi/customers/<str:salon_name>/slobodni-termini/', customer_views.available_slots_async, name='asgi_available_slots'),
+    path('wsgi/salons/<str:salon_name>/slots/', salon_views.get_slots_for_date, name='wsgi_get_slots'),
+    path('asgi/salons/<str:salon_name>/slots/', salon_views.get_slots_for_date_async, name='asgi_get_slots'),
+]
+
+
+def _summarize(latencies_ms, errors, wall_seconds):
+    latencies = sorted(latencies_ms)
+    count = len(latencies)
+    return {
+        'count': count,
+        'errors': errors,
+        'latency_ms_mean': round(statistics.mean(latencies), 3) if count else 0,
+        'latency_ms_p50': round(percentile(latencies, 50), 3),
+        'latency_ms_p95': round(percentile(latencies, 95), 3),
+        'wall_seconds': round(wall_seconds, 3),
+        'throughput_per_s': round(count / wall_seconds, 2) if wall_seconds else 0,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Poredi propusnost available_slots i get_slots_for_date pod paralelnim zahtevima: '
+        'sync view-ovi kroz WSGI handler (niti) naspram async view-ova kroz ASGI handler '
+        '(jedan event loop). Sve radi u jednom procesu preko test klijenata, pa meri '
+        'trošak handler-a i view-a, ne mrežnog servera. Upisuje test podatke sa '
+        'prefiksom i briše ih na kraju - ne pokretati na produkciji.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--salons', type=int, default=3)
+        parser.add_argument('--customers', type=int, default=10)
+        parser.add_argument('--days', type=int, default=5, help='Broj radnih dana za upite dostupnosti')
+        parser.add_argument('--requests', type=int, default=300, help='Zahteva po endpoint-u i varijanti')
+        parser.add_argument('--concurrency', type=int, default=20, help='Istovremenih zahteva (niti, odnosno task-ova)')
+        parser.add_argument('--cold', action='store_true', help='Pre svake varijante poništi keširane mape dana')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Putanja JSON fajla sa rezultatima')
+        parser.add_argument('--keep', action='store_true', help='Ne briši test podatke na kraju')
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor == 'sqlite' and connections['default'].settings_dict['NAME'] in ('', ':memory:'):
+            raise CommandError('SQLite baza u memoriji nije deljena između niti; koristite fajl ili Postgres.')
+
+        if Salon.objects.filter(name__startswith=f'{ASYNC_BENCH_PREFIX}-').exists():
+            raise CommandError(f'Postoje podaci sa prefiksom "{ASYNC_BENCH_PREFIX}-"; obrišite ih pre pokretanja.')
+
+        rng = random.Random(options['seed'])
+        salons, customers = seed_benchmark_data(
+            options['salons'], options['customers'], prefix=ASYNC_BENCH_PREFIX, seed=options['seed']
+        )
+
+        # Middleware kao u odgovarajućem deployment profilu (ASGI bez WhiteNoise-a)
+        asgi_middleware = [name for name in settings.MIDDLEWARE if not name.startswith('whitenoise.')]
+        results = {}
+
+        try:
+            with override_settings(ROOT_URLCONF=__name__, ALLOWED_HOSTS=['testserver']):
+                workload = self._build_workload(salons, customers, rng, options)
+                for endpoint, requests in workload.items():
+                    results[endpoint] = {
+                        'wsgi': self._run_wsgi(endpoint, requests, salons, options),
+                    }
+                    with override_settings(MIDDLEWARE=asgi_middleware):
+                        results[endpoint]['asgi'] = self._run_asgi(endpoint, requests, salons, options)
+        finally:
+            if not options['keep']:
+                cleanup_benchmark_data(prefix=ASYNC_BENCH_PREFIX)
+
+        report = {
+            'meta': {
+                **get_run_metadata(),
+                'parameters': {
+                    key: options[key]
+                    for key in ('salons', 'customers', 'days', 'requests', 'concurrency', 'cold', 'seed')
+                },
+            },
+            'results': results,
+        }
+
+        for endpoint, variants in results.items():
+            for variant, summary in variants.items():
+                self.stdout.write(
+                    f"{endpoint:16} {variant:5} n={summary['count']:<5} greške={summary['errors']:<3} "
+                    f"upiti={summary['queries_avg']!s:<6} p50={summary['latency_ms_p50']:.2f} ms "
+                    f"p95={summary['latency_ms_p95']:.2f} ms {summary['throughput_per_s']}/s"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(f"Rezultati su upisani u {options['output']}"))
+
+    def _build_workload(self, salons, customers, rng, options):
+        """Isti niz zahteva (korisnik, putanja, parametri) za obe varijante"""
+        dates = {item['salon'].id: next_working_dates(item['salon'], options['days']) for item in salons}
+        workload = {'available_slots': [], 'get_slots': []}
+
+        for _ in range(options['requests']):
+            item = rng.choice(salons)
+            salon = item['salon']
+            target_date = rng.choice(dates[salon.id]).isoformat()
+            workload['available_slots'].append((
+                rng.choice(customers),
+                f'customers/{salon.name}/slobodni-termini/',
+                {'date': target_date, 'service': rng.choice(item['services']).id},
+            ))
+
+            item = rng.choice(salons)
+            workload['get_slots'].append((
+                item['owner'],
+                f"salons/{item['salon'].name}/slots/",
+                {'date': rng.choice(dates[item['salon'].id]).isoformat()},
+            ))
+
+        return workload
+
+    def _session_cookies(self, requests):
+        cookies = {}
+        for user, _, _ in requests:
+            if user.id not in cookies:
+                client = Client()
+                client.force_login(user)
+                cookies[user.id] = client.cookies
+        return cookies
+
+    def _prepare(self, salons, options):
+        if options['cold']:
+            for item in salons:
+                bump_availability_version(item['salon'].id)
+        metrics.clear_samples()
+
+    def _query_stats(self, view_name):
+        for stats in metrics.get_view_stats():
+            if stats['view'] == view_name:
+                return {'queries_avg': stats['queries_avg'], 'queries_max': stats['queries_max']}
+        # Metrike zahteva su isključene (REQUEST_METRICS_ENABLED)
+        return {'queries_avg': None, 'queries_max': None}
+
+    def _run_wsgi(self, endpoint, requests, salons, options):
+        cookies = self._session_cookies(requests)
+        local = threading.local()
+        latencies = []
+        errors = []
+
+        def send(request):
+            user, url, params = request
+            clients = getattr(local, 'clients', None)
+            if clients is None:
+                clients = local.clients = {}
+            client = clients.get(user.id)
+            if client is None:
+                client = clients[user.id] = Client()
+                client.cookies = cookies[user.id]
+
+            started = time.perf_counter()
+            response = client.get(f'/wsgi/{url}', params)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+
+        def send_and_close(chunk):
+            try:
+                for request in chunk:
+                    send(request)
+            finally:
+                connections.close_all()
+
+        self._prepare(salons, options)
+        concurrency = options['concurrency']
+        chunks = [requests[index::concurrency] for index in range(concurrency)]
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(send_and_close, chunks))
+        wall_seconds = time.perf_counter() - started
+
+        return {**_summarize(latencies, len(errors), wall_seconds), **self._query_stats(f'wsgi_{endpoint}')}
+
+    def _run_asgi(self, endpoint, requests, salons, options):
+        cookies = self._session_cookies(requests)
+        latencies = []
+        errors = []
+
+        async def run_all():
+            clients = {}
+            for user_id, user_cookies in cookies.items():
+                clients[user_id] = AsyncClient()
+                clients[user_id].cookies = user_cookies
+            semaphore = asyncio.Semaphore(options['concurrency'])
+
+            async def send(request):
+                user, url, params = request
+                # Kao ASGIHandler.handle: svaki zahtev dobija svoju nit za sync
+                # kod (ORM); AsyncClient to ne radi sam
+                async with semaphore, ThreadSensitiveContext():
+                    started = time.perf_counter()
+                    response = await clients[user.id].get(f'/asgi/{url}', params)
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    if response.status_code != 200:
+                        errors.append(response.status_code)
+
+            await asyncio.gather(*(send(request) for request in requests))
+
+        self._prepare(salons, options)
+
+        started = time.perf_counter()
+        asyncio.run(run_all())
+        wall_seconds = time.perf_counter() - started
+
+        return {**_summarize(latencies, len(errors), wall_seconds), **self._query_stats(f'asgi_{endpoint}')}
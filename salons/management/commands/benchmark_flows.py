@@ -0,0 +1,226 @@
+import json
+import random
+import threading
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings
+from salons.benchmarks import (
+    BENCHMARK_PREFIX,
+    Measurement,
+    cleanup_benchmark_data,
+    get_run_metadata,
+    next_working_dates,
+    seed_benchmark_data,
+)
+from salons.models import Appointment, Salon
+from salons.utils import generate_slots_for_next_months, get_day_key
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark tokova zakazivanja i dostupnosti kroz ceo Django stek (test Client). '
+        'Upisuje test podatke sa prefiksom u podešenu bazu i briše ih na kraju - '
+        'pokretati na lokalnoj SQLite/Postgres bazi, ne na produkciji.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--salons', type=int, default=5)
+        parser.add_argument('--customers', type=int, default=20)
+        parser.add_argument('--days', type=int, default=5, help='Broj radnih dana za upite dostupnosti')
+        parser.add_argument('--threads', type=int, default=4, help='Broj niti za paralelno zakazivanje')
+        parser.add_argument('--bookings', type=int, default=10, help='Pokušaja zakazivanja po niti')
+        parser.add_argument('--months', type=int, default=2, help='Meseci za generate_slots_for_next_months')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Putanja JSON fajla sa rezultatima')
+        parser.add_argument('--keep', action='store_true', help='Ne briši test podatke na kraju')
+
+    def handle(self, *args, **options):
+        prefix = BENCHMARK_PREFIX
+        if Salon.objects.filter(name__startswith=f'{prefix}-').exists():
+            raise CommandError(
+                f'Postoje podaci sa prefiksom "{prefix}-" iz prethodnog pokretanja; obrišite ih pre benchmark-a.'
+            )
+
+        rng = random.Random(options['seed'])
+        results = {}
+
+        # Benchmark ne zavisi od collectstatic (manifest storage bez manifesta baca ValueError)
+        storages = {**settings.STORAGES, 'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}}
+
+        with override_settings(ALLOWED_HOSTS=['testserver'], STORAGES=storages):
+            salons, customers = seed_benchmark_data(
+                options['salons'], options['customers'], prefix=prefix, seed=options['seed']
+            )
+            try:
+                results['generate_slots_for_next_months'] = self._bench_generate(salons, options['months'])
+
+                dates = {
+                    item['salon'].id: next_working_dates(item['salon'], options['days'])
+                    for item in salons
+                }
+                results['available_slots_cold'] = self._bench_available(salons, customers[0], dates, 'cold')
+                results['available_slots_warm'] = self._bench_available(salons, customers[0], dates, 'warm')
+                results['get_slots_for_date'] = self._bench_owner_day(salons, dates)
+                results['booking_concurrent'] = self._bench_booking(salons, customers, dates, rng, options)
+                results['cancel_appointment'] = self._bench_cancel(salons)
+            finally:
+                if not options['keep']:
+                    cleanup_benchmark_data(prefix=prefix)
+
+        report = {
+            'meta': {
+                **get_run_metadata(),
+                'parameters': {
+                    key: options[key]
+                    for key in ('salons', 'customers', 'days', 'threads', 'bookings', 'months', 'seed')
+                },
+            },
+            'results': results,
+        }
+
+        for name, summary in results.items():
+            self.stdout.write(
+                f"{name:32} n={summary['count']:<5} greške={summary['errors']:<3} "
+                f"upiti={summary['queries_avg']:<6} p50={summary['latency_ms_p50']:.2f} ms "
+                f"p95={summary['latency_ms_p95']:.2f} ms {summary['throughput_per_s']}/s"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(f"Rezultati su upisani u {options['output']}"))
+
+    def _bench_generate(self, salons, months):
+        measurement = Measurement('generate_slots_for_next_months')
+        started = time.perf_counter()
+        for item in salons:
+            measurement.measure(generate_slots_for_next_months, item['salon'], months=months)
+        measurement.wall_seconds = time.perf_counter() - started
+        return measurement.summary()
+
+    def _bench_available(self, salons, customer, dates, name):
+        client = Client(raise_request_exception=False)
+        client.force_login(customer)
+        measurement = Measurement(f'available_slots_{name}')
+
+        started = time.perf_counter()
+        for item in salons:
+            salon = item['salon']
+            service = item['services'][0]
+            for target_date in dates[salon.id]:
+                response = measurement.measure(
+                    client.get,
+                    f'/customers/{salon.name}/slobodni-termini/',
+                    {'date': target_date.isoformat(), 'service': service.id}
+                )
+                if response.status_code != 200:
+                    measurement.errors += 1
+        measurement.wall_seconds = time.perf_counter() - started
+        return measurement.summary()
+
+    def _bench_owner_day(self, salons, dates):
+        measurement = Measurement('get_slots_for_date')
+
+        started = time.perf_counter()
+        for item in salons:
+            client = Client(raise_request_exception=False)
+            client.force_login(item['owner'])
+            for target_date in dates[item['salon'].id]:
+                response = measurement.measure(
+                    client.get,
+                    f"/salons/{item['salon'].name}/slots/",
+                    {'date': target_date.isoformat()}
+                )
+                if response.status_code != 200:
+                    measurement.errors += 1
+        measurement.wall_seconds = time.perf_counter() - started
+        return measurement.summary()
+
+    def _bench_booking(self, salons, customers, dates, rng, options):
+        """
+        Niti istovremeno zakazuju nasumične termine u prva dva dana svakog
+        salona, pa se pokušaji namerno preklapaju. Uspeh se broji po novim
+        Appointment redovima; odbijeni pokušaji (zauzet termin) nisu greške,
+        a greške (5xx, izuzetak) ne prekidaju nit.
+        """
+        attempts = []
+        for thread_index in range(options['threads']):
+            customer = customers[thread_index % len(customers)]
+            thread_attempts = []
+            for _ in range(options['bookings']):
+                item = rng.choice(salons)
+                salon = item['salon']
+                target_date = rng.choice(dates[salon.id][:2])
+                opening = salon.working_hours.get(day=get_day_key(target_date)).opening_time
+                hour = opening.hour + rng.randint(0, 5)
+                minute = rng.choice([0, salon.slot_interval_minutes]) % 60
+                thread_attempts.append((salon.name, target_date, f'{hour:02d}:{minute:02d}', rng.choice(item['services']).id))
+            attempts.append((customer, thread_attempts))
+
+        measurements = [Measurement('booking_concurrent') for _ in attempts]
+        barrier = threading.Barrier(len(attempts))
+        appointments_before = Appointment.objects.count()
+
+        def worker(customer, thread_attempts, measurement):
+            try:
+                client = Client(raise_request_exception=False)
+                client.force_login(customer)
+                barrier.wait()
+                for salon_name, target_date, slot_time, service_id in thread_attempts:
+                    try:
+                        response = measurement.measure(
+                            client.post,
+                            f'/customers/{salon_name}/zakazi/',
+                            {'service': service_id, 'date': target_date.isoformat(), 'slot': slot_time}
+                        )
+                    except Exception:
+                        # measure je već izbrojao grešku; nit nastavlja sa ostalim pokušajima
+                        continue
+                    if response.status_code >= 500:
+                        measurement.errors += 1
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=worker, args=(customer, thread_attempts, measurement))
+            for (customer, thread_attempts), measurement in zip(attempts, measurements)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        combined = Measurement('booking_concurrent')
+        for measurement in measurements:
+            combined.merge(measurement)
+        combined.wall_seconds = time.perf_counter() - started
+
+        summary = combined.summary()
+        summary['attempts'] = summary['count']
+        summary['booked'] = Appointment.objects.count() - appointments_before
+        summary['rejected'] = summary['count'] - summary['booked'] - summary['errors']
+        return summary
+
+    def _bench_cancel(self, salons):
+        measurement = Measurement('cancel_appointment')
+
+        started = time.perf_counter()
+        for item in salons:
+            client = Client(raise_request_exception=False)
+            client.force_login(item['owner'])
+            for slot_id in Appointment.objects.filter(salon=item['salon']).values_list('time_slot_id', flat=True):
+                response = measurement.measure(
+                    client.post,
+                    f"/salons/{item['salon'].name}/slots/{slot_id}/appointment/cancel/",
+                    data='{"cancellation_reason": "benchmark"}',
+                    content_type='application/json'
+                )
+                if response.status_code != 200:
+                    measurement.errors += 1
+        measurement.wall_seconds = time.perf_counter() - started
+        return measurement.summary()
+
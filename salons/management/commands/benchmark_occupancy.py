@@ -0,0 +1,57 @@
+from datetime import date, datetime, timedelta
+from timeit import timeit
+from django.core.management.base import BaseCommand
+from salons.occupancy import DayOccupancy
+from salons.utils import build_day_grid
+
+
+class Command(BaseCommand):
+    help = 'Mikro-benchmark: naivno preklapanje slot × termin naspram DayOccupancy (bez baze)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=int, default=15, help='Interval slotova u minutima')
+        parser.add_argument('--opening', default='08:00')
+        parser.add_argument('--closing', default='22:00')
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        target_date = date.today()
+        opening = datetime.strptime(options['opening'], '%H:%M').time()
+        closing = datetime.strptime(options['closing'], '%H:%M').time()
+        slot_minutes = options['interval']
+        repeat = options['repeat']
+
+        grid = build_day_grid(target_date, opening, closing, slot_minutes)
+
+        # Potpuno zauzet dan: po jedan termin na svakom slotu
+        intervals = []
+        for index, (begin_time, end_time) in enumerate(grid):
+            start = datetime.combine(target_date, begin_time)
+            intervals.append((start, start + timedelta(minutes=slot_minutes), index))
+
+        def naive():
+            busy = 0
+            for begin_time, end_time in grid:
+                slot_start = datetime.combine(target_date, begin_time)
+                slot_end = datetime.combine(target_date, end_time)
+                for busy_start, busy_end, _ in intervals:
+                    if slot_start < busy_end and slot_end > busy_start:
+                        busy += 1
+                        break
+            return busy
+
+        def indexed():
+            occupancy = DayOccupancy(target_date, intervals)
+            return sum(1 for begin_time, end_time in grid if occupancy.is_busy(begin_time, end_time))
+
+        if naive() != indexed():
+            self.stderr.write(self.style.ERROR('Rezultati se razlikuju!'))
+            return
+
+        naive_seconds = timeit(naive, number=repeat)
+        indexed_seconds = timeit(indexed, number=repeat)
+
+        self.stdout.write(f'Slotova: {len(grid)}, termina: {len(intervals)}, ponavljanja: {repeat}')
+        self.stdout.write(f'Naivno:        {naive_seconds * 1000 / repeat:.3f} ms po danu')
+        self.stdout.write(f'DayOccupancy:  {indexed_seconds * 1000 / repeat:.3f} ms po danu')
+        self.stdout.write(self.style.SUCCESS(f'Ubrzanje: {naive_seconds / indexed_seconds:.1f}x'))
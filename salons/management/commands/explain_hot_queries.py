@@ -0,0 +1,87 @@
+import re
+from datetime import date, time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from salons.models import Salon, TimeSlot, Appointment
+
+# PostgreSQL: "Seq Scan on ...", SQLite: "SCAN tabela" bez "USING ... INDEX"
+SEQUENTIAL_SCAN_PATTERNS = [
+    re.compile(r'Seq Scan on (\S+)'),
+    re.compile(r'\bSCAN (\w+)(?!.*USING)'),
+]
+
+
+def build_hot_queries(salon, customer, target_date):
+    """Upiti sa vrućih putanja zakazivanja, u obliku u kom ih aplikacija šalje"""
+    return [
+        ('Zauzetost dana (DayOccupancy)', Appointment.objects.filter(salon=salon, date=target_date)),
+        ('Aktivni termini dana', Appointment.objects.filter(salon=salon, date=target_date).exclude(status='otkazano')),
+        ('Termini salona po statusu', Appointment.objects.filter(salon=salon, status='na čekanju')),
+        ('Moji termini', Appointment.objects.filter(customer=customer).order_by('-date', '-begin_time')),
+        ('Slotovi dana', TimeSlot.objects.filter(salon=salon, date=target_date)),
+        (
+            'Slobodni slotovi dana',
+            TimeSlot.objects.filter(salon=salon, date=target_date, status='dostupan', appointment__isnull=True)
+        ),
+        (
+            'Zaključavanje opsega za rezervaciju',
+            TimeSlot.objects.filter(
+                salon=salon,
+                date=target_date,
+                begin_time__gte=time(10, 0),
+                begin_time__lt=time(11, 0)
+            ).order_by('begin_time')
+        ),
+        ('Direktorijum salona', Salon.objects.filter(is_approved=True, is_active=True).order_by('name')),
+    ]
+
+
+def find_sequential_scans(plan):
+    tables = []
+    for line in plan.splitlines():
+        for pattern in SEQUENTIAL_SCAN_PATTERNS:
+            match = pattern.search(line)
+            if match:
+                tables.append(match.group(1))
+    return tables
+
+
+class Command(BaseCommand):
+    help = 'Pokreće EXPLAIN za vruće upite i označava sekvencijalna skeniranja'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--salon', help='Ime salona za primer upita (podrazumevano prvi salon)')
+        parser.add_argument('--date', help='Datum za primer upita, YYYY-MM-DD (podrazumevano danas)')
+        parser.add_argument('--analyze', action='store_true', help='EXPLAIN ANALYZE (samo PostgreSQL)')
+
+    def handle(self, *args, **options):
+        salons = Salon.objects.order_by('pk')
+        salon = salons.filter(name=options['salon']).first() if options['salon'] else salons.first()
+        if salon is None:
+            raise CommandError('Nema salona za primer upita.')
+
+        target_date = date.fromisoformat(options['date']) if options['date'] else date.today()
+        customer = User.objects.order_by('pk').first()
+
+        explain_options = {}
+        if options['analyze'] and connection.vendor == 'postgresql':
+            explain_options['analyze'] = True
+
+        flagged = 0
+        for label, queryset in build_hot_queries(salon, customer, target_date):
+            plan = queryset.explain(**explain_options)
+            scanned_tables = find_sequential_scans(plan)
+
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(plan)
+
+            if scanned_tables:
+                flagged += 1
+                self.stdout.write(self.style.WARNING(f"Sekvencijalno skeniranje: {', '.join(scanned_tables)}"))
+            self.stdout.write('')
+
+        if flagged:
+            self.stdout.write(self.style.WARNING(f'{flagged} upita koristi sekvencijalno skeniranje.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Svi vrući upiti koriste indekse.'))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from salons.images import process_salon_image
+from salons.models import Salon
+
+
+class Command(BaseCommand):
+    help = 'Pravi responsive varijante (JPEG + WebP) za slike salona koje ih još nemaju'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Ponovo obradi i salone koji već imaju varijante')
+
+    def handle(self, *args, **options):
+        salons = Salon.objects.order_by('name')
+        if not options['all']:
+            salons = salons.filter(image_variants={})
+
+        processed = 0
+        for salon in salons:
+            try:
+                variants = process_salon_image(salon)
+            except (OSError, ValueError) as error:
+                self.stderr.write(f'{salon.name}: slika nije obrađena ({error})')
+                continue
+
+            processed += 1
+            self.stdout.write(f"{salon.name}: {', '.join(sorted(variants['jpeg'], key=int))} px")
+
+        self.stdout.write(self.style.SUCCESS(f'Obrađeno salona: {processed}'))
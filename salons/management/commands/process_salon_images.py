@@ -0,0 +1,41 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db import connections
+from salons.images import process_next_pending_image
+
+
+def _drain():
+    """Obrađuje slike dok ih ima; vraća broj obrađenih salona"""
+    processed = 0
+    try:
+        while process_next_pending_image() is not None:
+            processed += 1
+    finally:
+        connections.close_all()
+    return processed
+
+
+class Command(BaseCommand):
+    help = 'Obrađuje otpremljene slike salona iz staging-a (varijante van request-a)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help='Broj niti koje obrađuju slike paralelno (više od 1 na Postgres-u)')
+        parser.add_argument('--loop', action='store_true', help='Radi neprekidno umesto jednog prolaza')
+        parser.add_argument('--sleep', type=float, default=5.0, help='Pauza između prolaza u sekundama (uz --loop)')
+
+    def handle(self, *args, **options):
+        workers = max(options['workers'], 1)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while True:
+                processed = sum(executor.map(lambda _: _drain(), range(workers)))
+                if processed:
+                    self.stdout.write(f'Obrađeno slika: {processed}')
+
+                if not options['loop']:
+                    break
+
+                # Kad nema slika u staging-u, sačekaj pre sledećeg prolaza
+                if not processed:
+                    time.sleep(options['sleep'])
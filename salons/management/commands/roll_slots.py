@@ -0,0 +1,38 @@
+import time
+from django.core.management.base import BaseCommand
+from salons.models import Salon
+from salons.utils import SLOT_WINDOW_DAYS, roll_slot_window
+
+
+class Command(BaseCommand):
+    help = 'Pomera prozor slotova za sve odobrene salone (za cron, van špica)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=SLOT_WINDOW_DAYS, help='Dužina prozora u danima')
+        parser.add_argument('--salon', help='Samo salon sa ovim imenom')
+
+    def handle(self, *args, **options):
+        salons = Salon.objects.filter(is_approved=True).order_by('name')
+        if options['salon']:
+            salons = salons.filter(name=options['salon'])
+
+        total_started = time.perf_counter()
+        totals = {'attempted_slots': 0, 'skipped_slots': 0, 'purged_slots': 0}
+
+        for salon in salons:
+            started = time.perf_counter()
+            summary = roll_slot_window(salon, days=options['days'])
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+            for key in totals:
+                totals[key] += summary[key]
+
+            self.stdout.write(
+                f"{salon.name}: pokušano upisati {summary['attempted_slots']}, postojećih {summary['skipped_slots']}, "
+                f"obrisano {summary['purged_slots']} ({elapsed_ms:.0f} ms)"
+            )
+
+        total_ms = (time.perf_counter() - total_started) * 1000
+        self.stdout.write(self.style.SUCCESS(
+            f"Ukupno: pokušano upisati {totals['attempted_slots']}, obrisano {totals['purged_slots']} ({total_ms:.0f} ms)"
+        ))
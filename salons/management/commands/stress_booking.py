@@ -0,0 +1,213 @@
+import json
+import multiprocessing
+import random
+import threading
+import time
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, IntegrityError, connection, connections
+from salons.availability import book_appointment, get_day_grid
+from salons.benchmarks import (
+    cleanup_benchmark_data,
+    get_run_metadata,
+    next_working_dates,
+    percentile,
+    seed_benchmark_data,
+)
+from salons.integrity import find_booking_violations
+from salons.models import Salon
+
+
+STRESS_PREFIX = 'stress'
+
+
+def book_attempts(salon_id, attempts, barrier=None):
+    """
+    Izvršava pokušaje zakazivanja (datum, početak, usluga, mušterija) preko
+    book_appointment, istim putem kao booking_form.
+    Vraća listu (ishod, latencija_ms, tip_greške).
+    """
+    salon = Salon.objects.get(pk=salon_id)
+    services = {service.id: service for service in salon.services.all()}
+    customers = User.objects.in_bulk({customer_id for _, _, _, customer_id in attempts})
+    results = []
+
+    try:
+        if barrier is not None:
+            barrier.wait()
+
+        for target_date, begin_time, service_id, customer_id in attempts:
+            started = time.perf_counter()
+            error_type = None
+            try:
+                book_appointment(salon, target_date, begin_time, customers[customer_id], services[service_id])
+                outcome = 'booked'
+            except (ValidationError, IntegrityError):
+                outcome = 'rejected'
+            except DatabaseError as error:
+                # Deadlock, serijalizacija ili zaključana SQLite baza
+                outcome = 'db_error'
+                error_type = type(error).__name__
+            results.append((outcome, (time.perf_counter() - started) * 1000, error_type))
+    finally:
+        connections.close_all()
+
+    return results
+
+
+def _run_threads(salon_id, chunks):
+    results = []
+    barrier = threading.Barrier(len(chunks))
+    lock = threading.Lock()
+
+    def worker(chunk):
+        chunk_results = book_attempts(salon_id, chunk, barrier)
+        with lock:
+            results.extend(chunk_results)
+
+    threads = [threading.Thread(target=worker, args=(chunk,)) for chunk in chunks]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def _process_main(salon_id, chunks, queue):
+    queue.put(_run_threads(salon_id, chunks))
+
+
+class Command(BaseCommand):
+    help = (
+        'Stres test paralelnog zakazivanja preklapajućih termina (niti i procesi), '
+        'zatim provera invarijanti: nema dvostrukog zauzimanja ni "zauzet" slota bez termina. '
+        'Namenjeno lokalnoj Postgres bazi; na SQLite-u upisi čekaju jedan drugog.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attempts', type=int, default=400, help='Ukupan broj pokušaja zakazivanja')
+        parser.add_argument('--threads', type=int, default=8, help='Niti po procesu')
+        parser.add_argument('--processes', type=int, default=1)
+        parser.add_argument('--days', type=int, default=1, help='Broj radnih dana u koje se zakazuje')
+        parser.add_argument('--interval', type=int, default=15, choices=[15, 30, 60])
+        parser.add_argument('--customers', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Putanja JSON fajla sa rezultatima')
+        parser.add_argument('--keep', action='store_true', help='Ne briši test podatke na kraju')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and connection.settings_dict['NAME'] in ('', ':memory:'):
+            raise CommandError('SQLite baza u memoriji nije deljena između niti; koristite fajl ili Postgres.')
+
+        if Salon.objects.filter(name__startswith=f'{STRESS_PREFIX}-').exists():
+            raise CommandError(f'Postoje podaci sa prefiksom "{STRESS_PREFIX}-"; obrišite ih pre pokretanja.')
+
+        rng = random.Random(options['seed'])
+        salons, customers = seed_benchmark_data(
+            1, options['customers'], prefix=STRESS_PREFIX, seed=options['seed'], all_services=True
+        )
+        salon = salons[0]['salon']
+        salon.slot_interval_minutes = options['interval']
+        salon.save(update_fields=['slot_interval_minutes'])
+
+        try:
+            dates = next_working_dates(salon, options['days'])
+            report = self._run(salon, salons[0]['services'], customers, dates, rng, options)
+        finally:
+            if not options['keep']:
+                cleanup_benchmark_data(prefix=STRESS_PREFIX)
+
+        summary = report['results']
+        self.stdout.write(
+            f"Pokušaja: {summary['attempts']}, zakazano: {summary['booked']}, odbijeno: {summary['rejected']}, "
+            f"greške baze: {summary['db_errors']} ({summary['wall_seconds']:.2f} s)"
+        )
+        self.stdout.write(
+            f"Propusnost: {summary['attempts_per_s']} pokušaja/s, {summary['booked_per_s']} zakazivanja/s, "
+            f"p50={summary['latency_ms_p50']:.2f} ms, p95={summary['latency_ms_p95']:.2f} ms"
+        )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, indent=2, ensure_ascii=False)
+
+        violations = report['violations']
+        if violations:
+            for violation in violations[:20]:
+                self.stderr.write(f"{violation['date']} {violation['type']}: {violation['detail']}")
+            raise CommandError(f'Prekršene invarijante zakazivanja: {len(violations)}')
+
+        self.stdout.write(self.style.SUCCESS('Invarijante važe: nema dvostrukog zauzimanja.'))
+
+    def _run(self, salon, services, customers, dates, rng, options):
+        start_times = [
+            (target_date, begin_time)
+            for target_date in dates
+            for begin_time, _ in get_day_grid(salon, target_date)
+        ]
+        attempts = [
+            (*rng.choice(start_times), rng.choice(services).id, rng.choice(customers).id)
+            for _ in range(options['attempts'])
+        ]
+
+        workers = options['processes'] * options['threads']
+        chunks = [attempts[index::workers] for index in range(workers)]
+
+        started = time.perf_counter()
+        if options['processes'] > 1:
+            results = self._run_processes(salon.id, chunks, options)
+        else:
+            results = _run_threads(salon.id, chunks)
+        wall_seconds = time.perf_counter() - started
+
+        latencies = sorted(latency for _, latency, _ in results)
+        outcomes = [outcome for outcome, _, _ in results]
+        error_types = {}
+        for _, _, error_type in results:
+            if error_type:
+                error_types[error_type] = error_types.get(error_type, 0) + 1
+
+        return {
+            'meta': {
+                **get_run_metadata(),
+                'parameters': {
+                    key: options[key]
+                    for key in ('attempts', 'threads', 'processes', 'days', 'interval', 'customers', 'seed')
+                },
+            },
+            'results': {
+                'attempts': len(results),
+                'booked': outcomes.count('booked'),
+                'rejected': outcomes.count('rejected'),
+                'db_errors': outcomes.count('db_error'),
+                'db_error_types': error_types,
+                'wall_seconds': round(wall_seconds, 3),
+                'attempts_per_s': round(len(results) / wall_seconds, 2) if wall_seconds else 0,
+                'booked_per_s': round(outcomes.count('booked') / wall_seconds, 2) if wall_seconds else 0,
+                'latency_ms_p50': round(percentile(latencies, 50), 3),
+                'latency_ms_p95': round(percentile(latencies, 95), 3),
+            },
+            'violations': find_booking_violations(salon, dates[0], dates[-1]),
+        }
+
+    def _run_processes(self, salon_id, chunks, options):
+        # Procesi nasleđuju konekcije roditelja; zatvaraju se pre fork-a
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        queue = context.Queue()
+        threads = options['threads']
+
+        processes = [
+            context.Process(target=_process_main, args=(salon_id, chunks[index:index + threads], queue))
+            for index in range(0, len(chunks), threads)
+        ]
+        for process in processes:
+            process.start()
+
+        results = []
+        for _ in processes:
+            results.extend(queue.get())
+        for process in processes:
+            process.join()
+        return results
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_appointment_day(apps, schema_editor):
+    Appointment = apps.get_model('salons', 'Appointment')
+    appointments = list(Appointment.objects.select_related('time_slot'))
+    for appointment in appointments:
+        appointment.date = appointment.time_slot.date
+        appointment.begin_time = appointment.time_slot.begin_time
+    Appointment.objects.bulk_update(appointments, ['date', 'begin_time'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salons', '0013_alter_appointment_id_alter_salon_id_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='begin_time',
+            field=models.TimeField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='date',
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_appointment_day, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(condition=models.Q(('status', 'otkazano'), _negated=True), fields=['salon', 'date', 'begin_time'], name='appointment_active_day_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['salon', 'date'], name='appointment_salon_day_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['salon', 'status'], name='appointment_salon_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['customer', '-date', '-begin_time'], name='appointment_customer_day_idx'),
+        ),
+    ]
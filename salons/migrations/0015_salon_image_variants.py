@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salons', '0014_appointment_denormalized_day'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salon',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salons', '0015_salon_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salon',
+            name='pending_image',
+            field=models.FileField(blank=True, editable=False, upload_to='staging/salons/'),
+        ),
+    ]
@@ -1,11 +1,17 @@
 from django.db import models, transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import User
-from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
 from datetime import datetime, timedelta
 import math
 import logging
+import os
+import uuid
+from sistem_zakazivanja.emails import enqueue_email
+from .occupancy import DayOccupancy
+from .versions import invalidate_availability
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +21,10 @@ class Salon(models.Model):
     name = models.CharField(max_length=50, unique=True)
     description = models.TextField(unique=True)
     image = models.ImageField(default='img/barber_default.jpg')
+    # Imena generisanih varijanti: {'jpeg': {'320': ime, ...}, 'webp': {...}}
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    # Otpremljena slika koja čeka obradu (manage.py process_salon_images)
+    pending_image = models.FileField(upload_to='staging/salons/', blank=True, editable=False)
     address = models.CharField(max_length=200, unique=True)
     phone = models.CharField(max_length=20, unique=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -26,16 +36,33 @@ class Salon(models.Model):
     )
     # ovde mozda dodati i komentare i ocene
 
+    IMAGE_FIELDS = ('image', 'image_variants', 'pending_image')
+
     class Meta:
         verbose_name_plural = "Saloni"
 
     def save(self, *args, **kwargs):
         is_new = self.pk is None
         was_approved = False
+        previous = None
         if self.pk:
-            previous = Salon.objects.filter(pk=self.pk).only('is_approved').first()
+            previous = Salon.objects.filter(pk=self.pk).only('is_approved', 'image', 'image_variants', 'pending_image').first()
             was_approved = previous.is_approved if previous else False
 
+        image_fields = []
+        if self.image and not self.image._committed:
+            self._stage_uploaded_image(previous)
+            image_fields = ['pending_image']
+
+        if previous is not None and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            # Sliku i varijante upisuje samo obrada slike (update_fields), pa
+            # pun save iz forme ili admina ne vraća staru vrednost preko
+            # upravo obrađene slike
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.IMAGE_FIELDS
+            ] + image_fields
+
         super().save(*args, **kwargs)
 
         if is_new and not self.is_approved:
@@ -44,6 +71,25 @@ class Salon(models.Model):
         if not was_approved and self.is_approved:
             self._send_approval_email()
 
+    def _stage_uploaded_image(self, previous):
+        """
+        Nova slika iz forme ide u staging, a obradu (varijante) radi worker van
+        zahteva. Do tada salon zadržava prethodnu obrađenu sliku, odnosno
+        podrazumevanu za nov salon.
+        """
+        uploaded = self.image
+        if previous is not None and previous.pending_image:
+            # Ranija slika još nije obrađena - zamenjuje je nova
+            previous.pending_image.delete(save=False)
+        # Jedinstveno ime: obrada slike po njemu prepoznaje da li je u staging-u
+        # i dalje ista slika
+        self.pending_image.save(f'{uuid.uuid4().hex}-{os.path.basename(uploaded.name)}', uploaded.file, save=False)
+
+        if previous is not None:
+            self.image, self.image_variants = previous.image.name, previous.image_variants
+        else:
+            self.image, self.image_variants = self._meta.get_field('image').get_default(), {}
+
     def _get_admin_notification_recipients(self):
         recipients = getattr(settings, 'SALON_APPROVAL_NOTIFY_EMAILS', []) or []
 
@@ -83,14 +129,7 @@ class Salon(models.Model):
             </html>
             """
 
-            email_message = EmailMultiAlternatives(
-                subject,
-                message_text,
-                settings.DEFAULT_FROM_EMAIL,
-                recipients,
-            )
-            email_message.attach_alternative(message_html, 'text/html')
-            email_message.send(fail_silently=False)
+            enqueue_email(subject, message_text, recipients, html_message=message_html)
         except Exception:
             logger.exception('Neuspešno slanje emaila adminu za salon koji čeka odobrenje (salon_id=%s).', self.pk)
 
@@ -126,14 +165,7 @@ class Salon(models.Model):
             </html>
             """
 
-            email_message = EmailMultiAlternatives(
-                subject,
-                message_text,
-                settings.DEFAULT_FROM_EMAIL,
-                [owner_email],
-            )
-            email_message.attach_alternative(message_html, 'text/html')
-            email_message.send(fail_silently=False)
+            enqueue_email(subject, message_text, [owner_email], html_message=message_html)
         except Exception:
             logger.exception('Neuspešno slanje emaila vlasniku za odobren salon (salon_id=%s).', self.pk)
     
@@ -189,6 +221,25 @@ class SalonWorkingHours(models.Model):
         return f"{self.salon.name} - {self.get_day_display()}: Zatvoreno"
 
 
+class AvailabilityQuerySet(models.QuerySet):
+    """
+    Masovno brisanje slotova i termina poništava svaki pogođeni (salon, dan)
+    jednom. Ovi modeli namerno nemaju post_delete signale: signal bi Django-u
+    isključio fast-delete, pa bi brisanje salona ili korisnika učitavalo i
+    poništavalo red po red.
+    """
+
+    def delete(self):
+        days = set(self.values_list('salon_id', 'date').distinct())
+        result = super().delete()
+        for salon_id, target_date in days:
+            invalidate_availability(salon_id, target_date)
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
 class TimeSlot(models.Model):
     STATUS_CHOICES = [
         ('dostupan', 'Dostupan'), 
@@ -202,6 +253,8 @@ class TimeSlot(models.Model):
     end_time = models.TimeField()
     status = models.CharField(max_length=9, choices=STATUS_CHOICES, default='dostupan')
 
+    objects = AvailabilityQuerySet.as_manager()
+
     class Meta:
         unique_together = ['salon', 'date', 'begin_time']  
         ordering = ['date', 'begin_time']
@@ -213,6 +266,11 @@ class TimeSlot(models.Model):
     def clean(self):
         if self.begin_time >= self.end_time:
             raise ValidationError("Početno vreme mora biti pre završnog")
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        invalidate_availability(self.salon_id, self.date)
+        return result
     
     def __str__(self):
         return f"{self.salon.name} - {self.date} {self.begin_time}-{self.end_time} ({self.status})"
@@ -234,14 +292,34 @@ class Appointment(models.Model):
     status = models.CharField(max_length=15, choices=STATUS_CHOICES, default='na čekanju')
     notes = models.TextField(blank=True)
     cancellation_reason = models.TextField(blank=True)
+    # Denormalizovano iz time_slot-a da bi se vruće pretrage radile bez join-a
+    date = models.DateField(null=True, editable=False)
+    begin_time = models.TimeField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    
+
+    objects = AvailabilityQuerySet.as_manager()
+
     class Meta:
         verbose_name_plural = "Rezervacije"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['salon', 'date', 'begin_time'],
+                condition=~models.Q(status='otkazano'),
+                name='appointment_active_day_idx'
+            ),
+            models.Index(fields=['salon', 'date'], name='appointment_salon_day_idx'),
+            models.Index(fields=['salon', 'status'], name='appointment_salon_status_idx'),
+            models.Index(fields=['customer', '-date', '-begin_time'], name='appointment_customer_day_idx'),
+        ]
     
     def save(self, *args, **kwargs):
+        self._sync_slot_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'time_slot' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'date', 'begin_time'}
+
         with transaction.atomic():
             previous = None
             if self.pk:
@@ -267,6 +345,21 @@ class Appointment(models.Model):
                 slots = self._get_slots_for(self.time_slot, self.service, create_missing=False)
                 self._release_slots(slots, exclude_appointment_id=self.pk)
 
+            if previous and previous.time_slot.date != self.date:
+                invalidate_availability(previous.salon_id, previous.time_slot.date)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        invalidate_availability(self.salon_id, self.date)
+        return result
+
+    def _sync_slot_fields(self):
+        if self.time_slot_id is None:
+            return
+
+        self.date = self.time_slot.date
+        self.begin_time = self.time_slot.begin_time
+
     def _get_slot_minutes(self, time_slot):
         start = datetime.combine(time_slot.date, time_slot.begin_time)
         end = datetime.combine(time_slot.date, time_slot.end_time)
@@ -282,33 +375,43 @@ class Appointment(models.Model):
         return start, end, slot_minutes, required_slots
 
     def _get_slots_for(self, time_slot, service, create_missing=False):
+        """
+        Učitava sve slotove koje termin pokriva jednim range upitom i zaključava
+        ih (select_for_update) do kraja transakcije. Nedostajući slotovi se, ako
+        je create_missing, ubacuju jednim bulk_create pre zaključavanja.
+        """
         start, _, slot_minutes, required_slots = self._get_time_range(time_slot, service)
-        slots = []
-
+        expected = []
         for index in range(required_slots):
             slot_start = start + timedelta(minutes=slot_minutes * index)
-            slot_end = slot_start + timedelta(minutes=slot_minutes)
-            slot_start_time = slot_start.time()
-
-            if create_missing:
-                slot, _ = TimeSlot.objects.get_or_create(
-                    salon=time_slot.salon,
+            expected.append((slot_start.time(), (slot_start + timedelta(minutes=slot_minutes)).time()))
+
+        range_end = (start + timedelta(minutes=slot_minutes * required_slots)).time()
+        slots_query = TimeSlot.objects.filter(
+            salon_id=time_slot.salon_id,
+            date=time_slot.date,
+            begin_time__gte=start.time(),
+            begin_time__lt=range_end
+        ).order_by('begin_time')
+
+        if create_missing:
+            existing_times = set(slots_query.values_list('begin_time', flat=True))
+            missing_slots = [
+                TimeSlot(
+                    salon_id=time_slot.salon_id,
                     date=time_slot.date,
-                    begin_time=slot_start_time,
-                    defaults={
-                        'end_time': slot_end.time(),
-                        'status': 'dostupan'
-                    }
+                    begin_time=begin_time,
+                    end_time=end_time,
+                    status='dostupan'
                 )
-            else:
-                slot = TimeSlot.objects.filter(
-                    salon=time_slot.salon,
-                    date=time_slot.date,
-                    begin_time=slot_start_time
-                ).first()
+                for begin_time, end_time in expected
+                if begin_time not in existing_times
+            ]
+            if missing_slots:
+                TimeSlot.objects.bulk_create(missing_slots, ignore_conflicts=True)
 
-            if slot:
-                slots.append(slot)
+        slots_by_time = {slot.begin_time: slot for slot in slots_query.select_for_update()}
+        slots = [slots_by_time[begin_time] for begin_time, _ in expected if begin_time in slots_by_time]
 
         if len(slots) < required_slots:
             raise ValidationError('Nema dovoljno slobodnih slotova za izabranu uslugu.')
@@ -316,56 +419,108 @@ class Appointment(models.Model):
         return slots
 
     def _assert_slots_available(self, slots):
+        booked_slot_ids = set(
+            Appointment.objects.filter(
+                time_slot_id__in=[slot.id for slot in slots]
+            ).exclude(pk=self.pk).values_list('time_slot_id', flat=True)
+        )
+
+        occupancy = None
         for slot in slots:
             if slot.status == 'blokiran':
                 raise ValidationError('Izabrani termin je blokiran.')
 
-            if hasattr(slot, 'appointment') and slot.appointment_id != self.pk:
+            if slot.id in booked_slot_ids:
                 raise ValidationError('Izabrani termin je već zauzet.')
 
-            if slot.status == 'zauzet' and not hasattr(slot, 'appointment'):
-                raise ValidationError('Izabrani termin je već zauzet.')
+            if slot.status == 'zauzet':
+                # Postojeći termin sme da zadrži slotove koje sam pokriva
+                if not self.pk:
+                    raise ValidationError('Izabrani termin je već zauzet.')
+
+                if occupancy is None:
+                    appointments = Appointment.objects.select_related('time_slot', 'service').filter(
+                        salon_id=slot.salon_id,
+                        date=slot.date
+                    )
+                    occupancy = DayOccupancy.from_appointments(slot.date, appointments, exclude_appointment_id=self.pk)
+
+                if occupancy.is_busy(slot.begin_time, slot.end_time):
+                    raise ValidationError('Izabrani termin je već zauzet.')
 
     def _mark_slots_busy(self, slots):
+        slot_ids = [slot.id for slot in slots if slot.status != 'zauzet']
+        if slot_ids:
+            TimeSlot.objects.filter(id__in=slot_ids).update(status='zauzet')
+
         for slot in slots:
-            if slot.status != 'zauzet':
-                slot.status = 'zauzet'
-                slot.save(update_fields=['status'])
+            slot.status = 'zauzet'
 
     def _release_slots(self, slots, exclude_appointment_id=None):
         if not slots:
             return
 
         appointments = Appointment.objects.select_related('time_slot', 'service').filter(
-            time_slot__salon=slots[0].salon,
-            time_slot__date=slots[0].date
+            salon_id=slots[0].salon_id,
+            date=slots[0].date
         ).exclude(status='otkazano')
 
         if exclude_appointment_id:
             appointments = appointments.exclude(pk=exclude_appointment_id)
 
-        busy_ranges = []
-        for appointment in appointments:
-            start, end, _, _ = self._get_time_range(appointment.time_slot, appointment.service)
-            busy_ranges.append((start, end))
-
-        for slot in slots:
-            if slot.status == 'blokiran':
-                continue
-
-            slot_start = datetime.combine(slot.date, slot.begin_time)
-            slot_end = datetime.combine(slot.date, slot.end_time)
+        occupancy = DayOccupancy.from_appointments(slots[0].date, appointments)
 
-            overlapping = any(
-                slot_start < busy_end and slot_end > busy_start
-                for busy_start, busy_end in busy_ranges
-            )
+        released_slots = [
+            slot
+            for slot in slots
+            if slot.status != 'blokiran' and not occupancy.is_busy(slot.begin_time, slot.end_time)
+        ]
+        if not released_slots:
+            return
 
-            if not overlapping:
-                slot.status = 'dostupan'
-                slot.save(update_fields=['status'])
+        TimeSlot.objects.filter(id__in=[slot.id for slot in released_slots]).update(status='dostupan')
+        for slot in released_slots:
+            slot.status = 'dostupan'
     
     def __str__(self):
         return f"{self.customer.username} - {self.time_slot.date} {self.time_slot.begin_time}"
 
 
+# SIGNALS
+@receiver(post_save, sender=TimeSlot)
+@receiver(post_save, sender=Appointment)
+def bump_day_availability(sender, instance, **kwargs):
+    """
+    Svaka izmena slota ili termina poništava ETag dostupnosti za taj dan.
+    Brisanje pokrivaju delete() modela i AvailabilityQuerySet.
+    """
+    invalidate_availability(instance.salon_id, instance.date)
+
+
+@receiver(pre_delete, sender=User)
+def bump_customer_appointment_days(sender, instance, **kwargs):
+    """Termini korisnika se brišu kaskadno (fast-delete), bez delete() po redu"""
+    days = Appointment.objects.filter(customer=instance).values_list('salon_id', 'date').distinct()
+    for salon_id, target_date in set(days):
+        invalidate_availability(salon_id, target_date)
+
+
+@receiver(post_save, sender=Salon)
+@receiver(post_delete, sender=Salon)
+@receiver(post_save, sender=SalonWorkingHours)
+@receiver(post_delete, sender=SalonWorkingHours)
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def bump_salon_availability(sender, instance, **kwargs):
+    """
+    Radno vreme i interval menjaju mrežu svih dana salona, a trajanje usluge
+    (ili brisanje usluge) menja koliko slotova pokrivaju njeni termini
+    """
+    origin = kwargs.get('origin')
+    if origin is not None and sender is not Salon:
+        origin_model = origin.model if isinstance(origin, models.QuerySet) else type(origin)
+        if origin_model is not sender:
+            # Kaskada od brisanja salona; post_delete salona poništava sve jednom
+            return
+
+    invalidate_availability(instance.pk if sender is Salon else instance.salon_id)
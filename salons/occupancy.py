@@ -0,0 +1,58 @@
+from bisect import bisect_left
+from datetime import datetime
+
+
+class DayOccupancy:
+    """
+    Zauzetost jednog dana salona: intervali termina sortirani po početku,
+    izgrađeni jednom po (salon, datum).
+
+    Pored sortiranih početaka čuva se i prefiksni maksimum krajeva, pa se
+    pitanje "koji termin pokriva slot" rešava bisect pretragom i kratkim
+    hodom unazad umesto poređenjem slota sa svakim terminom dana.
+    """
+
+    def __init__(self, target_date, intervals):
+        self.date = target_date
+        self.intervals = sorted(intervals, key=lambda item: (item[0], item[1]))
+        self._starts = [start for start, _, _ in self.intervals]
+        self._max_ends = []
+
+        max_end = None
+        for _, end, _ in self.intervals:
+            max_end = end if max_end is None or end > max_end else max_end
+            self._max_ends.append(max_end)
+
+    @classmethod
+    def from_appointments(cls, target_date, appointments, exclude_appointment_id=None):
+        """
+        Gradi zauzetost iz termina dana (očekuje select_related('time_slot', 'service')).
+        Otkazani termini ne zauzimaju vreme.
+        """
+        intervals = []
+
+        for appointment in appointments:
+            if appointment.status == 'otkazano' or appointment.pk == exclude_appointment_id:
+                continue
+
+            start, end, _, _ = appointment._get_time_range(appointment.time_slot, appointment.service)
+            intervals.append((start, end, appointment))
+
+        return cls(target_date, intervals)
+
+    def covering(self, begin_time, end_time):
+        """Vraća termin koji se preklapa sa slotom [begin_time, end_time) ili None"""
+        slot_start = datetime.combine(self.date, begin_time)
+        slot_end = datetime.combine(self.date, end_time)
+
+        index = bisect_left(self._starts, slot_end) - 1
+        while index >= 0 and self._max_ends[index] > slot_start:
+            _, end, appointment = self.intervals[index]
+            if end > slot_start:
+                return appointment
+            index -= 1
+
+        return None
+
+    def is_busy(self, begin_time, end_time):
+        return self.covering(begin_time, end_time) is not None
@@ -17,8 +17,11 @@ if (userEditBtn && userEditBtn.dataset.url) {
 
 // slots
 class SalonScheduler {
-    constructor(salonName) {
+    constructor(salonName, slotEventsUrl) {
         this.salonName = salonName;
+        this.slotEventsUrl = slotEventsUrl;
+        this.eventSource = null;
+        this.eventsDate = null;
         this.selectedDate = new Date();
         this.selectedDate.setHours(12, 0, 0, 0);
         this.init();
@@ -107,6 +110,7 @@ class SalonScheduler {
             this.renderSlots(data.slots);
             this.updateSelectedDateDisplay(date);
             this.updateDatePicker(date);
+            this.subscribeToSlotEvents(dateStr);
             
         } catch (error) {
             console.error('Error loading slots:', error);
@@ -114,6 +118,41 @@ class SalonScheduler {
         }
     }
     
+    // Promene slotova uživo (SSE); bez podrške servera ostaje ručno učitavanje
+    subscribeToSlotEvents(dateStr) {
+        if (!this.slotEventsUrl || !window.EventSource || this.eventsDate === dateStr) {
+            return;
+        }
+
+        if (this.eventSource) {
+            this.eventSource.close();
+        }
+
+        this.eventsDate = dateStr;
+        this.eventSource = new EventSource(`${this.slotEventsUrl}?date=${dateStr}`);
+        this.eventSource.addEventListener('slots', (event) => {
+            const data = JSON.parse(event.data);
+            if (data.date !== this.formatDate(this.selectedDate)) {
+                return;
+            }
+
+            if (data.full) {
+                this.renderSlots(data.slots);
+            } else {
+                data.slots.forEach(slot => this.replaceSlot(slot));
+            }
+        });
+    }
+
+    replaceSlot(slot) {
+        const container = document.getElementById('time-slots-container');
+        const current = container && container.querySelector(`[data-begin-time="${slot.begin_time}"]`);
+
+        if (current) {
+            current.replaceWith(this.createSlotElement(slot));
+        }
+    }
+    
     loadSlotsForToday() {
         this.loadSlots(this.selectedDate);
     }
@@ -146,6 +185,7 @@ class SalonScheduler {
         const slotDiv = document.createElement('div');
         slotDiv.className = `time-slot time-slot-${slot.status}`;
         slotDiv.dataset.slotId = slot.id;
+        slotDiv.dataset.beginTime = slot.begin_time;
         
         slotDiv.innerHTML = `
             <span class="time">${slot.begin_time} - ${slot.end_time}</span>
@@ -183,7 +223,11 @@ class SalonScheduler {
         
         if (actions.includes('block')) {
             if (confirm('Želite da blokirate ovaj termin?')) {
-                this.blockSlot(slot.id);
+                if (slot.id) {
+                    this.blockSlot(slot.id);
+                } else {
+                    this.blockSlotAtTime(slot);
+                }
             }
         }
 
@@ -378,6 +422,34 @@ class SalonScheduler {
         }
     }
     
+    // Blokiraj slot koji još nije kreiran u bazi (virtuelni slot)
+    async blockSlotAtTime(slot) {
+        try {
+            const response = await fetch(`/salons/${this.salonName}/slots/block/`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-CSRFToken': this.getCsrfToken()
+                },
+                body: JSON.stringify({
+                    date: this.formatDate(this.selectedDate),
+                    begin_time: slot.begin_time
+                })
+            });
+
+            if (!response.ok) {
+                throw new Error('Failed to block slot');
+            }
+
+            this.loadSlots(this.selectedDate);
+            this.showSuccess('Termin je blokiran');
+
+        } catch (error) {
+            console.error('Error blocking slot:', error);
+            this.showError('Greška pri blokiranju termina');
+        }
+    }
+    
     // Odblokiraj slot
     async unblockSlot(slotId) {
         if (!slotId) {
@@ -465,7 +537,7 @@ document.addEventListener('DOMContentLoaded', () => {
     
     if (salonIdElement) {
         const salonName = salonIdElement.dataset.salonName;
-        window.salonScheduler = new SalonScheduler(salonName);
+        window.salonScheduler = new SalonScheduler(salonName, salonIdElement.dataset.slotEventsUrl);
     }
 });
 
@@ -739,7 +811,8 @@ function initImageUpload() {
                 return;
             }
 
-            const outputSize = 500;
+            // Server pravi manje varijante; ovde se samo ograničava najveća
+            const outputSize = Math.min(960, Math.round(cropperInstance.getData().width));
 
             try {
                 const canvas = cropperInstance.getCroppedCanvas({
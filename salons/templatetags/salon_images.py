@@ -0,0 +1,51 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+
+register = template.Library()
+
+# Kartice: 1 kolona do 480px, 2 do 768px, inače 3 (grid-3-col u customers.css)
+DEFAULT_SIZES = '(max-width: 480px) 90vw, (max-width: 768px) 45vw, 30vw'
+
+
+def _srcset(variants):
+    return ', '.join(
+        f'{default_storage.url(name)} {width}w'
+        for width, name in sorted(variants.items(), key=lambda item: int(item[0]))
+    )
+
+
+@register.simple_tag
+def salon_picture(salon, sizes=DEFAULT_SIZES, loading='lazy'):
+    """
+    <picture> sa WebP i JPEG srcset-om iz salon.image_variants, pa pregledač
+    bira najmanju dovoljnu varijantu. Saloni bez varijanti dobijaju običan <img>.
+    """
+    variants = salon.image_variants or {}
+    jpeg_variants = variants.get('jpeg')
+
+    if not jpeg_variants:
+        return format_html('<img src="{}" alt="{}" loading="{}">', salon.image.url, salon.name, loading)
+
+    largest = max(jpeg_variants, key=int)
+    sources = format_html_join(
+        '',
+        '<source type="image/{}" srcset="{}" sizes="{}">',
+        (
+            (format_key, _srcset(format_variants), sizes)
+            for format_key, format_variants in variants.items()
+            if format_key != 'jpeg' and format_variants
+        )
+    )
+
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" loading="{}"></picture>',
+        sources,
+        default_storage.url(jpeg_variants[largest]),
+        _srcset(jpeg_variants),
+        sizes,
+        largest,
+        largest,
+        salon.name,
+        loading,
+    )
@@ -1,3 +1,259 @@
+from datetime import date, time, timedelta
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from salons.availability import get_day_view, get_free_slots, get_or_create_slot
+from salons.daymap import DaySlotMap
+from salons.models import Appointment, Salon, Service, TimeSlot
+from salons.versions import get_availability_version
+from salons.utils import (
+    create_default_working_hours,
+    generate_time_slots_for_date,
+    get_weekly_schedule,
+    regenerate_future_slots_incremental,
+    upsert_working_hours,
+)
 
-# Create your tests here.
+
+def next_weekday(weekday, after=None):
+    """Prvi datum posle `after` (podrazumevano danas) koji pada na dati dan u nedelji"""
+    current = (after or date.today()) + timedelta(days=1)
+    while current.weekday() != weekday:
+        current += timedelta(days=1)
+    return current
+
+
+class SalonTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        owner = User.objects.create_user('frizer', 'frizer@example.com', 'lozinka')
+        self.customer = User.objects.create_user('musterija', 'musterija@example.com', 'lozinka')
+        self.salon = Salon.objects.create(
+            owner=owner,
+            name='salon-test',
+            description='opis',
+            address='adresa',
+            phone='060000000',
+            is_approved=True,
+            is_active=True,
+        )
+        create_default_working_hours(self.salon)
+        self.service = Service.objects.create(salon=self.salon, name='šišanje', description='opis', price=1000, duration=60)
+
+    def book(self, target_date, begin_time, service=None, customer=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            slot = get_or_create_slot(self.salon, target_date, begin_time)
+            return Appointment.objects.create(
+                salon=self.salon,
+                time_slot=slot,
+                customer=customer or self.customer,
+                service=service or self.service,
+                status='na čekanju',
+            )
+
+
+class BookingTests(SalonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.target_date = next_weekday(0)
+        self.short_service = Service.objects.create(salon=self.salon, name='brada', description='opis', price=500, duration=30)
+
+    def slot_statuses(self):
+        return dict(
+            TimeSlot.objects.filter(salon=self.salon, date=self.target_date).values_list('begin_time', 'status')
+        )
+
+    def test_multi_slot_service_books_every_covered_slot(self):
+        appointment = self.book(self.target_date, time(10, 0))
+
+        self.assertEqual(self.slot_statuses(), {time(10, 0): 'zauzet', time(10, 30): 'zauzet'})
+        self.assertEqual((appointment.date, appointment.begin_time), (self.target_date, time(10, 0)))
+
+        day_view = {item['begin_time']: item for item in get_day_view(self.salon, self.target_date)}
+        self.assertEqual(day_view[time(10, 30)]['status'], 'zauzet')
+        self.assertTrue(day_view[time(10, 30)]['has_appointment'])
+        self.assertEqual(day_view[time(11, 0)]['status'], 'dostupan')
+
+    def test_overlapping_booking_is_rejected(self):
+        self.book(self.target_date, time(10, 0))
+        other = User.objects.create_user('druga', 'druga@example.com', 'lozinka')
+
+        for begin_time, service in ((time(10, 30), self.short_service), (time(9, 30), self.service)):
+            with self.subTest(begin_time=begin_time), self.assertRaises(ValidationError):
+                self.book(self.target_date, begin_time, service=service, customer=other)
+
+        self.assertEqual(Appointment.objects.filter(salon=self.salon).count(), 1)
+        self.assertEqual(self.slot_statuses()[time(9, 30)], 'dostupan')
+
+    def test_cancel_releases_slots(self):
+        appointment = self.book(self.target_date, time(10, 0))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment.status = 'otkazano'
+            appointment.save()
+
+        self.assertEqual(self.slot_statuses(), {time(10, 0): 'dostupan', time(10, 30): 'dostupan'})
+        # Otkazan termin ostaje vezan za svoj slot, ali slot iza njega se može zakazati
+        free_starts = [item['begin_time'] for item in get_free_slots(self.salon, self.target_date, duration=30)]
+        self.assertNotIn(time(10, 0), free_starts)
+        self.assertIn(time(10, 30), free_starts)
+
+        self.book(self.target_date, time(10, 30), service=self.short_service)
+        self.assertEqual(self.slot_statuses()[time(10, 30)], 'zauzet')
+
+
+class IntervalChangeTests(SalonTestCase):
+    def test_booked_day_keeps_persisted_grid_after_interval_change(self):
+        booked_date = next_weekday(0)
+        free_date = next_weekday(1, after=booked_date)
+        with self.captureOnCommitCallbacks(execute=True):
+            generate_time_slots_for_date(self.salon, booked_date)
+            generate_time_slots_for_date(self.salon, free_date)
+        first_slot = TimeSlot.objects.get(salon=self.salon, date=booked_date, begin_time=time(9, 0))
+        self.book(booked_date, time(10, 0))
+
+        previous_schedule = get_weekly_schedule(self.salon)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.salon.slot_interval_minutes = 60
+            self.salon.save()
+            summary = regenerate_future_slots_incremental(self.salon, previous_schedule, 30)
+        self.assertGreaterEqual(summary['skipped_days'], 1)
+
+        day_view = get_day_view(self.salon, booked_date)
+        self.assertEqual(len(day_view), 16)
+        self.assertEqual(
+            (day_view[0]['id'], day_view[0]['begin_time'], day_view[0]['end_time']),
+            (first_slot.id, time(9, 0), time(9, 30))
+        )
+        self.assertEqual([item['status'] for item in day_view[2:4]], ['zauzet', 'zauzet'])
+
+        free_starts = [item['begin_time'] for item in get_free_slots(self.salon, booked_date, duration=60)]
+        self.assertIn(time(9, 0), free_starts)
+        self.assertNotIn(time(9, 30), free_starts)
+        self.assertIn(time(11, 0), free_starts)
+
+        regenerated_view = get_day_view(self.salon, free_date)
+        self.assertEqual(len(regenerated_view), 8)
+        self.assertEqual(regenerated_view[0]['end_time'], time(10, 0))
+
+    def test_longer_persisted_slot_spans_cells(self):
+        target_date = next_weekday(0)
+        day_map = DaySlotMap(target_date, time(9, 0), time(11, 0), 30)
+        times = [(time(9, 0), time(9, 30)), (time(9, 30), time(10, 30))]
+        self.assertFalse(all(day_map.fits(*item) for item in times))
+
+        day_map = day_map.with_slots(times)
+        day_map.add_slot(1, time(9, 0), 'dostupan', False, end_time=time(9, 30))
+        day_map.add_slot(2, time(9, 30), 'blokiran', False, end_time=time(10, 30))
+
+        self.assertEqual(
+            [(item['id'], item['begin_time'], item['end_time'], item['status']) for item in day_map.to_day_view()],
+            [
+                (1, time(9, 0), time(9, 30), 'dostupan'),
+                (2, time(9, 30), time(10, 30), 'blokiran'),
+                (None, time(10, 30), time(11, 0), 'dostupan'),
+            ]
+        )
+        self.assertEqual(day_map.bitmap_string(day_map.startable()), '1001')
+
+
+class DeleteInvalidationTests(SalonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.target_date = next_weekday(0)
+        with self.captureOnCommitCallbacks(execute=True):
+            generate_time_slots_for_date(self.salon, self.target_date)
+        self.book(self.target_date, time(10, 0))
+
+    def assert_invalidates_day(self, delete):
+        version = get_availability_version(self.salon.id, self.target_date)
+        with self.captureOnCommitCallbacks(execute=True):
+            delete()
+        self.assertNotEqual(get_availability_version(self.salon.id, self.target_date), version)
+
+    def test_single_and_bulk_deletes_invalidate_day(self):
+        self.assert_invalidates_day(
+            lambda: TimeSlot.objects.get(salon=self.salon, date=self.target_date, begin_time=time(9, 0)).delete()
+        )
+        self.assert_invalidates_day(lambda: Appointment.objects.filter(salon=self.salon).delete())
+        self.assert_invalidates_day(lambda: TimeSlot.objects.filter(salon=self.salon, begin_time__gte=time(16, 0)).delete())
+
+    def test_customer_delete_invalidates_booked_day(self):
+        self.assert_invalidates_day(self.customer.delete)
+
+    def test_salon_delete_is_fast_and_invalidates_once(self):
+        salon_id = self.salon.id
+        with mock.patch('salons.models.invalidate_availability') as invalidate, CaptureQueriesContext(connection) as queries:
+            self.salon.delete()
+
+        invalidate.assert_called_once_with(salon_id)
+        selects = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('SELECT')]
+        # Termini se brišu bez učitavanja, a od slotova se čitaju samo id-jevi za kaskadu
+        self.assertFalse([sql for sql in selects if 'FROM "salons_appointment"' in sql])
+        self.assertEqual(
+            [sql.split(' FROM ')[0] for sql in selects if 'FROM "salons_timeslot"' in sql],
+            ['SELECT "salons_timeslot"."id"']
+        )
+
+
+class RegenerationTests(SalonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.booked_date = next_weekday(0)
+        self.free_date = next_weekday(0, after=self.booked_date)
+        with self.captureOnCommitCallbacks(execute=True):
+            generate_time_slots_for_date(self.salon, self.booked_date)
+            generate_time_slots_for_date(self.salon, self.free_date)
+        self.book(self.booked_date, time(10, 0))
+
+    def day_rows(self, target_date):
+        return list(
+            TimeSlot.objects.filter(salon=self.salon, date=target_date)
+            .order_by('begin_time')
+            .values_list('id', 'begin_time', 'end_time', 'status')
+        )
+
+    def regenerate(self, slot_interval_minutes=None, hours_payload=None):
+        previous_schedule = get_weekly_schedule(self.salon)
+        previous_interval = self.salon.slot_interval_minutes
+        with self.captureOnCommitCallbacks(execute=True):
+            if slot_interval_minutes:
+                self.salon.slot_interval_minutes = slot_interval_minutes
+                self.salon.save()
+            if hours_payload:
+                upsert_working_hours(self.salon, hours_payload)
+            return regenerate_future_slots_incremental(self.salon, previous_schedule, previous_interval)
+
+    def test_interval_change_skips_booked_days(self):
+        booked_rows = self.day_rows(self.booked_date)
+
+        summary = self.regenerate(slot_interval_minutes=60)
+
+        self.assertEqual(self.day_rows(self.booked_date), booked_rows)
+        free_rows = self.day_rows(self.free_date)
+        self.assertEqual(len(free_rows), 8)
+        self.assertTrue(all(end_time.hour - begin_time.hour == 1 for _, begin_time, end_time, _ in free_rows))
+        self.assertGreaterEqual(summary['skipped_days'], 1)
+        self.assertGreaterEqual(summary['regenerated_days'], 1)
+
+    def test_hours_change_keeps_booked_slots(self):
+        summary = self.regenerate(hours_payload=[{
+            'day': 'ponedeljak',
+            'is_working': True,
+            'opening_time': time(10, 0),
+            'closing_time': time(12, 0),
+        }])
+
+        self.assertEqual(summary['skipped_days'], 0)
+        for target_date in (self.booked_date, self.free_date):
+            with self.subTest(target_date=target_date):
+                begin_times = [begin_time for _, begin_time, _, _ in self.day_rows(target_date)]
+                self.assertEqual(begin_times, [time(10, 0), time(10, 30), time(11, 0), time(11, 30)])
+
+        statuses = {begin_time: status for _, begin_time, _, status in self.day_rows(self.booked_date)}
+        self.assertEqual(statuses[time(10, 30)], 'zauzet')
+        self.assertEqual(statuses[time(11, 0)], 'dostupan')
@@ -1,14 +1,18 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
 app_name = 'salons'
 
+get_slots_view = views.get_slots_for_date_async if settings.ASYNC_AVAILABILITY_VIEWS else views.get_slots_for_date
+
 urlpatterns = [
     # pages
     path('<str:salon_name>/salons/', views.salon_dashboard, name='salon_dashboard'),
     path('<str:salon_name>/services/', views.services_page, name='services_page'),
     path('<str:salon_name>/schedule/', views.appointments_page, name='appointments'),
-    path('<str:salon_name>/slots/', views.get_slots_for_date, name='get_slots'),
+    path('<str:salon_name>/slots/', get_slots_view, name='get_slots'),
+    path('<str:salon_name>/slots/events/', views.slot_events, name='slot_events'),
     path('create_salon/', views.create_salon, name='create_salon'),
     path('<str:salon_name>/edit_salon/', views.edit_salon, name='edit_salon'),
 
@@ -18,6 +22,7 @@ urlpatterns = [
     path('<str:salon_name>/services/<int:service_id>/delete', views.delete_service, name='delete_service'),
 
     # appoitments
+    path('<str:salon_name>/slots/block/', views.block_slot_at_time, name='block_slot_at_time'),
     path('<str:salon_name>/slots/<int:slot_id>/block/', views.block_slot, name='block_slot'),
     path('<str:salon_name>/slots/<int:slot_id>/unblock/', views.unblock_slot, name='unblock_slot'),
     path('<str:salon_name>/slots/<int:slot_id>/appointment/', views.appointment_details, name='appointment_details'),
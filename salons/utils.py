@@ -1,16 +1,11 @@
 from datetime import date, datetime, timedelta, time
+from django.db import transaction
 from .models import SalonWorkingHours, TimeSlot, Appointment
+from .versions import batched_invalidation, invalidate_availability
 
 
-DAY_MAPPING = {
-    'monday': 'ponedeljak',
-    'tuesday': 'utorak',
-    'wednesday': 'sreda',
-    'thursday': 'cetvrtak',
-    'friday': 'petak',
-    'saturday': 'subota',
-    'sunday': 'nedelja'
-}
+SLOT_BULK_BATCH_SIZE = 500
+SLOT_WINDOW_DAYS = 60
 
 DEFAULT_WORKING_HOURS = {
     'ponedeljak': {'is_working': True, 'opening': time(9, 0), 'closing': time(17, 0)},
@@ -70,72 +65,143 @@ def create_default_working_hours(salon):
         )
 
 
-def generate_slots_for_next_months(salon, months=2):
+def get_day_key(target_date):
+    """Vraća ključ dana u nedelji (npr. 'ponedeljak') za dati datum"""
+    return SalonWorkingHours.DAYS[target_date.weekday()][0]
+
+
+def get_working_hours_by_day(salon):
     """
-    Generiše slotove za narednih X meseci od danas
+    Učitava radno vreme salona jednim upitom.
+    Vraća mapu {dan: (opening_time, closing_time)} samo za radne dane.
     """
-    start_date = date.today()
-    end_date = start_date + timedelta(days=30 * months) 
-    
+    return {
+        item.day: (item.opening_time, item.closing_time)
+        for item in SalonWorkingHours.objects.filter(salon=salon, is_working=True)
+    }
+
+
+def build_day_grid(target_date, opening_time, closing_time, slot_minutes):
+    """Računa listu (begin_time, end_time) parova za jedan dan, bez upita ka bazi"""
+    grid = []
+    current_time = datetime.combine(target_date, opening_time)
+    end_time = datetime.combine(target_date, closing_time)
+    slot_duration = timedelta(minutes=slot_minutes)
+
+    while current_time + slot_duration <= end_time:
+        slot_end = current_time + slot_duration
+        grid.append((current_time.time(), slot_end.time()))
+        current_time = slot_end
+
+    return grid
+
+
+def build_slot_grid(salon, start_date, end_date, working_hours=None):
+    """
+    Računa kompletnu mrežu slotova za period [start_date, end_date] u memoriji.
+    Vraća listu (date, begin_time, end_time) sortiranu po datumu i vremenu.
+    """
+    if working_hours is None:
+        working_hours = get_working_hours_by_day(salon)
+
+    slot_minutes = getattr(salon, 'slot_interval_minutes', 30) or 30
+    grid = []
+
     current_date = start_date
-    
     while current_date <= end_date:
-        generate_time_slots_for_date(salon, current_date)
+        hours = working_hours.get(get_day_key(current_date))
+        if hours:
+            opening_time, closing_time = hours
+            for begin_time, end_time in build_day_grid(current_date, opening_time, closing_time, slot_minutes):
+                grid.append((current_date, begin_time, end_time))
         current_date += timedelta(days=1)
 
+    return grid
 
-def generate_time_slots_for_date(salon, target_date):
+
+def bulk_generate_slots(salon, start_date, end_date, working_hours=None, batch_size=SLOT_BULK_BATCH_SIZE, load_slots=True):
     """
-    Generiše sve moguće time slotove za salon na određeni datum
+    Set-based generisanje slotova za period [start_date, end_date]:
+    radno vreme se učitava jednom, mreža se računa u memoriji, postojeći
+    (salon, date, begin_time) ključevi se učitavaju jednim upitom, a nedostajući
+    redovi se ubacuju preko bulk_create u batch-evima.
+    Sa load_slots=False vraćaju se samo brojači, bez ponovnog čitanja slotova.
+
+    attempted_slots je broj redova koji su nedostajali pri čitanju postojećih
+    ključeva; bulk_create sa ignore_conflicts ne javlja koliko je redova
+    preskočio (npr. dodao ih je paralelan poziv), pa stvarno dodatih može biti manje.
     """
-    # 1. Odredi dan u nedelji
-    day_name = target_date.strftime('%A').lower()
-    serbian_day = DAY_MAPPING.get(day_name)
-    
-    # 2. Proveri da li salon radi tog dana
-    try:
-        working_hours = SalonWorkingHours.objects.get(
+    grid = build_slot_grid(salon, start_date, end_date, working_hours=working_hours)
+    grid_keys = {(slot_date, begin_time) for slot_date, begin_time, _ in grid}
+
+    existing_keys = set(
+        TimeSlot.objects.filter(
+            salon=salon,
+            date__range=(start_date, end_date)
+        ).values_list('date', 'begin_time')
+    )
+    existing_grid_count = len(grid_keys & existing_keys)
+
+    missing_slots = [
+        TimeSlot(
             salon=salon,
-            day=serbian_day,
-            is_working=True
+            date=slot_date,
+            begin_time=begin_time,
+            end_time=end_time,
+            status='dostupan'
         )
-    except SalonWorkingHours.DoesNotExist:
-        # Ne radi tog dana - ne generiši slotove
-        return []
-    
-    # 3. Generiši sve slotove od opening do closing (svakih 15 ili 30 min)
-    slots = []
-    current_time = datetime.combine(target_date, working_hours.opening_time)
-    end_time = datetime.combine(target_date, working_hours.closing_time)
-    slot_minutes = getattr(salon, 'slot_interval_minutes', 30) or 30
-    slot_duration = timedelta(minutes=slot_minutes)
-    
-    while current_time + slot_duration <= end_time:
-        slot_end = current_time + slot_duration
-        
-        # 4. Proveri da li slot već postoji
-        existing_slot = TimeSlot.objects.filter(
+        for slot_date, begin_time, end_time in grid
+        if (slot_date, begin_time) not in existing_keys
+    ]
+
+    if missing_slots:
+        TimeSlot.objects.bulk_create(missing_slots, batch_size=batch_size, ignore_conflicts=True)
+        _invalidate_slot_dates(salon, missing_slots)
+
+    if not load_slots:
+        return {
+            'slots': None,
+            'attempted_slots': len(missing_slots),
+            'skipped_slots': existing_grid_count,
+        }
+
+    slots = [
+        slot
+        for slot in TimeSlot.objects.filter(
             salon=salon,
-            date=target_date,
-            begin_time=current_time.time()
-        ).first()
-        
-        if existing_slot:
-            slots.append(existing_slot)
-        else:
-            # Kreiraj novi slot
-            slot = TimeSlot.objects.create(
-                salon=salon,
-                date=target_date,
-                begin_time=current_time.time(),
-                end_time=slot_end.time(),
-                status='dostupan'
-            )
-            slots.append(slot)
-        
-        current_time += slot_duration
-    
-    return slots
+            date__range=(start_date, end_date)
+        ).order_by('date', 'begin_time')
+        if (slot.date, slot.begin_time) in grid_keys
+    ]
+
+    return {
+        'slots': slots,
+        'attempted_slots': len(missing_slots),
+        'skipped_slots': existing_grid_count,
+    }
+
+
+def _invalidate_slot_dates(salon, slots):
+    """bulk_create ne šalje signale, pa se dani novih slotova poništavaju ovde"""
+    for slot_date in {slot.date for slot in slots}:
+        invalidate_availability(salon.id, slot_date)
+
+
+def generate_slots_for_next_months(salon, months=2):
+    """
+    Generiše slotove za narednih X meseci od danas
+    """
+    start_date = date.today()
+    end_date = start_date + timedelta(days=30 * months)
+
+    return bulk_generate_slots(salon, start_date, end_date)
+
+
+def generate_time_slots_for_date(salon, target_date):
+    """
+    Generiše sve moguće time slotove za salon na određeni datum
+    """
+    return bulk_generate_slots(salon, target_date, target_date)['slots']
 
 
 def add_one_day_slots(salon):
@@ -143,80 +209,155 @@ def add_one_day_slots(salon):
     Dodaje slotove za jedan novi dan (2 meseca unapred od danas)
     Koristi se u daily task-u
     """
-    target_date = date.today() + timedelta(days=60) 
+    target_date = date.today() + timedelta(days=SLOT_WINDOW_DAYS)
     generate_time_slots_for_date(salon, target_date)
 
 
-def regenerate_future_slots_after_hours_change(salon, changed_day):
+def purge_past_available_slots(before_date, salon=None):
+    """
+    Briše prošle DOSTUPNE slotove jednim upitom. Slotovi vezani za termin
+    (i otkazan) ostaju zbog istorije termina.
+    """
+    slots = TimeSlot.objects.filter(
+        date__lt=before_date,
+        status='dostupan',
+        appointment__isnull=True
+    )
+    if salon is not None:
+        slots = slots.filter(salon=salon)
+
+    with batched_invalidation():
+        deleted, _ = slots.delete()
+    return deleted
+
+
+def roll_slot_window(salon, days=SLOT_WINDOW_DAYS):
     """
-    Kada se promeni radno vreme, regeneriši buduće slotove za taj dan
-    Briše samo DOSTUPNE slotove (ne dira zauzete termine)
+    Pomera prozor slotova salona na [danas, danas + days]: briše prošle
+    dostupne slotove i dopunjuje nedostajuće. Idempotentno - drugi poziv
+    istog dana ne menja ništa.
     """
     today = date.today()
-    end_date = today + timedelta(days=60)
-    
-    current_date = today
-    
-    while current_date <= end_date:
-        # Proveri da li je ovaj dan u nedelji jednak promenjenom danu
-        day_name = current_date.strftime('%A').lower()
-        if DAY_MAPPING[day_name] == changed_day:
-            # Obriši samo DOSTUPNE slotove za taj dan
-            TimeSlot.objects.filter(
-                salon=salon,
-                date=current_date,
-                status='dostupan'
-            ).delete()
-            
-            # Regeneriši slotove
-            generate_time_slots_for_date(salon, current_date)
-        
-        current_date += timedelta(days=1)
+    purged_slots = purge_past_available_slots(today, salon=salon)
+    summary = bulk_generate_slots(salon, today, today + timedelta(days=days), load_slots=False)
+
+    return {
+        'attempted_slots': summary['attempted_slots'],
+        'skipped_slots': summary['skipped_slots'],
+        'purged_slots': purged_slots,
+    }
+
+
+def get_weekly_schedule(salon):
+    """Vraća mapu {dan: (is_working, opening_time, closing_time)} za sve dane salona"""
+    return {
+        item.day: (item.is_working, item.opening_time, item.closing_time)
+        for item in SalonWorkingHours.objects.filter(salon=salon)
+    }
 
 
-def regenerate_future_slots_all_days(salon):
+def regenerate_future_slots_incremental(salon, previous_schedule, previous_interval, days=SLOT_WINDOW_DAYS):
+    """
+    Inkrementalna regeneracija slotova posle izmene radnog vremena ili intervala.
+
+    Poredi stari i novi nedeljni raspored i za ceo prozor [danas, danas + days]
+    računa tačno koje DOSTUPNE slotove (bez termina) treba obrisati i koje
+    nedostaju, pa to primenjuje jednim DELETE i jednim bulk_create u istoj
+    transakciji. Zauzeti i blokirani slotovi se ne diraju.
+
+    Dani sa aktivnim terminima se preskaču samo kada se promeni interval
+    (kao ranije), jer bi nova mreža sekla postojeće termine.
+    """
     today = date.today()
-    end_date = today + timedelta(days=60)
+    end_date = today + timedelta(days=days)
+    current_schedule = get_weekly_schedule(salon)
+    interval_changed = previous_interval != salon.slot_interval_minutes
+
+    changed_days = {
+        day
+        for day in set(previous_schedule) | set(current_schedule)
+        if interval_changed or previous_schedule.get(day) != current_schedule.get(day)
+    }
+
+    summary = {
+        'regenerated_days': 0,
+        'skipped_days': 0,
+        'deleted_slots': 0,
+        'attempted_slots': 0,
+    }
+    if not changed_days:
+        return summary
+
+    booked_dates = set()
+    if interval_changed:
+        booked_dates = set(
+            Appointment.objects.filter(
+                salon=salon,
+                date__range=(today, end_date)
+            ).exclude(status='otkazano').values_list('date', flat=True)
+        )
+
+    working_hours = {
+        day: (opening_time, closing_time)
+        for day, (is_working, opening_time, closing_time) in current_schedule.items()
+        if is_working
+    }
+    target_grid = {}
+    for slot_date, begin_time, end_time in build_slot_grid(salon, today, end_date, working_hours=working_hours):
+        target_grid.setdefault(slot_date, {})[begin_time] = end_time
+
+    existing_by_date = {}
+    for slot_id, slot_date, begin_time, end_time, status, appointment_id in TimeSlot.objects.filter(
+        salon=salon,
+        date__range=(today, end_date)
+    ).values_list('id', 'date', 'begin_time', 'end_time', 'status', 'appointment'):
+        existing_by_date.setdefault(slot_date, []).append((slot_id, begin_time, end_time, status, appointment_id))
+
+    delete_ids = []
+    missing_slots = []
 
     current_date = today
     while current_date <= end_date:
-        TimeSlot.objects.filter(
-            salon=salon,
-            date=current_date,
-            status='dostupan'
-        ).delete()
-        generate_time_slots_for_date(salon, current_date)
-        current_date += timedelta(days=1)
+        if get_day_key(current_date) not in changed_days:
+            current_date += timedelta(days=1)
+            continue
 
+        if current_date in booked_dates:
+            summary['skipped_days'] += 1
+            current_date += timedelta(days=1)
+            continue
 
-def regenerate_future_slots_without_booked_days(salon):
-    today = date.today()
-    end_date = today + timedelta(days=60)
+        day_grid = target_grid.get(current_date, {})
+        kept_times = set()
 
-    current_date = today
-    regenerated_days = 0
-    skipped_days = 0
+        for slot_id, begin_time, end_time, status, appointment_id in existing_by_date.get(current_date, []):
+            removable = status == 'dostupan' and appointment_id is None
+            if removable and day_grid.get(begin_time) != end_time:
+                delete_ids.append(slot_id)
+            else:
+                kept_times.add(begin_time)
 
-    while current_date <= end_date:
-        has_active_appointments = Appointment.objects.filter(
-            time_slot__salon=salon,
-            time_slot__date=current_date,
-        ).exclude(status='otkazano').exists()
-
-        if has_active_appointments:
-            skipped_days += 1
-        else:
-            TimeSlot.objects.filter(
+        missing_slots.extend(
+            TimeSlot(
                 salon=salon,
                 date=current_date,
+                begin_time=begin_time,
+                end_time=end_time,
                 status='dostupan'
-            ).delete()
-            generate_time_slots_for_date(salon, current_date)
-            regenerated_days += 1
+            )
+            for begin_time, end_time in day_grid.items()
+            if begin_time not in kept_times
+        )
 
+        summary['regenerated_days'] += 1
         current_date += timedelta(days=1)
 
-    return {
-        'regenerated_days': regenerated_days,
-        'skipped_days': skipped_days,
-    }
\ No newline at end of file
+    with batched_invalidation(), transaction.atomic():
+        if delete_ids:
+            summary['deleted_slots'], _ = TimeSlot.objects.filter(id__in=delete_ids).delete()
+        if missing_slots:
+            TimeSlot.objects.bulk_create(missing_slots, batch_size=SLOT_BULK_BATCH_SIZE, ignore_conflicts=True)
+            summary['attempted_slots'] = len(missing_slots)
+            _invalidate_slot_dates(salon, missing_slots)
+
+    return summary
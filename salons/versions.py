@@ -0,0 +1,112 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import time
+from django.core.cache import cache
+from django.db import transaction
+from .events import publish_availability_change
+
+
+# Skup (salon_id, datum) parova dok traje batched_invalidation, inače None
+_pending_invalidations = ContextVar('pending_availability_invalidations', default=None)
+
+
+def _initial_version():
+    # Početna vrednost iz vremena, da posle izbacivanja ključa iz cache-a
+    # stari ETag-ovi ne bi slučajno ponovo važili
+    return int(time.time() * 1000)
+
+
+def _salon_key(salon_id):
+    return f'availability:{salon_id}'
+
+
+def _day_key(salon_id, target_date):
+    return f'availability:{salon_id}:{target_date.isoformat()}'
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), None)
+        version = cache.get(key)
+    return version
+
+
+async def _aget_version(key):
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, _initial_version(), None)
+        version = await cache.aget(key)
+    return version
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_version(), None)
+
+
+def bump_availability_version(salon_id, target_date=None):
+    """
+    Povećava verziju dostupnosti za (salon, datum), ili za ceo salon kada
+    datum nije zadat (npr. promena radnog vremena ili intervala).
+    """
+    if target_date is None:
+        _bump(_salon_key(salon_id))
+    else:
+        _bump(_day_key(salon_id, target_date))
+
+
+def invalidate_availability(salon_id, target_date=None):
+    """
+    Povećava verziju tek posle uspešnog commit-a. Dok transakcija traje,
+    čitaoci i dalje vide (i keširaju) stanje pre izmene pod starom verzijom,
+    a rollback ne menja verziju - otkazano zakazivanje ne kvari cache.
+    Van transakcije se verzija povećava odmah.
+
+    Posle povećanja verzije promena se javlja SSE klijentima (salons.events),
+    pa oni već čitaju novo stanje.
+    """
+    pending = _pending_invalidations.get()
+    if pending is not None:
+        pending.add((salon_id, target_date))
+        return
+
+    def on_commit():
+        bump_availability_version(salon_id, target_date)
+        publish_availability_change(salon_id, target_date)
+
+    transaction.on_commit(on_commit)
+
+
+def get_availability_version(salon_id, target_date):
+    """Verzija dostupnosti dana: kombinacija verzije salona i verzije dana"""
+    return f'{_get_version(_salon_key(salon_id))}.{_get_version(_day_key(salon_id, target_date))}'
+
+
+async def aget_availability_version(salon_id, target_date):
+    """Async varijanta get_availability_version, za async view-ove"""
+    salon_version = await _aget_version(_salon_key(salon_id))
+    day_version = await _aget_version(_day_key(salon_id, target_date))
+    return f'{salon_version}.{day_version}'
+
+
+@contextmanager
+def batched_invalidation():
+    """
+    Za masovne izmene slotova: poništavanja unutar bloka (signali, brisanja,
+    bulk_create) samo beleže (salon, datum), a na izlazu se svaki par
+    poništava jednom. Poništavanje celog salona pokriva sve njegove datume.
+    """
+    pending = set()
+    token = _pending_invalidations.set(pending)
+    try:
+        yield
+    finally:
+        _pending_invalidations.reset(token)
+
+        salon_wide = {salon_id for salon_id, target_date in pending if target_date is None}
+        for salon_id, target_date in pending:
+            if target_date is None or salon_id not in salon_wide:
+                invalidate_availability(salon_id, target_date)
@@ -1,25 +1,39 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse, HttpResponseForbidden
-from django.views.decorators.http import require_POST
-from django.core.mail import EmailMultiAlternatives
+from django.http import JsonResponse, HttpResponseForbidden, StreamingHttpResponse
+from django.views.decorators.http import require_POST, condition
+from django.views.decorators.cache import cache_control
 from django.conf import settings
-from datetime import date, timedelta, datetime
+from django.db import connections
+from django.urls import reverse
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from datetime import date, datetime
+import asyncio
 import json
 from django.contrib import messages
-from sistem_zakazivanja.decorators import require_barber_with_approved_salon
-from sistem_zakazivanja.models import UserProfile
-from .models import Salon, TimeSlot, Appointment, Service, SalonWorkingHours
+from sistem_zakazivanja.decorators import require_barber_with_approved_salon, async_condition
+from sistem_zakazivanja.profiles import get_request_profile, get_owned_salon, aget_owned_salon
+from sistem_zakazivanja.emails import enqueue_email
+from .models import Salon, TimeSlot, Service, SalonWorkingHours
 from .utils import (
-    generate_time_slots_for_date,
     create_default_working_hours,
     generate_slots_for_next_months,
-    regenerate_future_slots_after_hours_change,
-    regenerate_future_slots_without_booked_days,
+    get_weekly_schedule,
+    regenerate_future_slots_incremental,
     get_default_working_hours_map,
     upsert_working_hours,
 )
+from .availability import (
+    get_day_view,
+    get_or_create_slot,
+    load_day_occupancy,
+    get_availability_etag,
+    aget_day_view,
+    aget_availability_etag,
+)
+from .events import SALON_WIDE, get_broker
 from .forms import SalonForm, ServiceForm, SalonScheduleForm
 
 
@@ -40,13 +54,29 @@ def _build_initial_working_hours(salon=None):
     return initial_hours
 
 
+def _get_request_salon(request, salon_name, **filters):
+    """Koristi salon već razrešen dekoratorom ako je to traženi salon, inače ga učitava"""
+    owned_salon = get_owned_salon(request)
+    if owned_salon is not None and owned_salon.name == salon_name:
+        return owned_salon
+    return get_object_or_404(Salon, name=salon_name, **filters)
+
+
+async def _aget_request_salon(request, salon_name, **filters):
+    """Async varijanta _get_request_salon"""
+    owned_salon = await aget_owned_salon(request)
+    if owned_salon is not None and owned_salon.name == salon_name:
+        return owned_salon
+    return await aget_object_or_404(Salon, name=salon_name, **filters)
+
+
 def _build_schedule_rows(schedule_form):
     return schedule_form.get_day_rows()
 
 
 @require_barber_with_approved_salon
 def salon_dashboard(request, salon_name):
-    salon = get_object_or_404(Salon, name=salon_name)
+    salon = _get_request_salon(request, salon_name)
 
     if not (request.user.is_superuser or request.user.is_staff):
         if salon.owner != request.user:
@@ -55,15 +85,15 @@ def salon_dashboard(request, salon_name):
     # Filtriraj termine samo za danas i sortiraj po vremenu
     today = date.today()
     appointments = salon.appointments.filter(
-        time_slot__date=today
-    ).select_related('time_slot', 'service', 'customer').order_by('time_slot__begin_time').exclude(status='otkazano')
+        date=today
+    ).select_related('time_slot', 'service', 'customer').order_by('begin_time').exclude(status='otkazano')
 
     return render(request, 'salons/dashboard.html', {'salon': salon, 'appointments': appointments})
 
 
 @require_barber_with_approved_salon
 def services_page(request, salon_name):
-    salon = get_object_or_404(Salon, name=salon_name)
+    salon = _get_request_salon(request, salon_name)
 
     if not (request.user.is_superuser or request.user.is_staff):
         if salon.owner != request.user:
@@ -76,7 +106,7 @@ def services_page(request, salon_name):
 
 @require_barber_with_approved_salon
 def appointments_page(request, salon_name):
-    salon = get_object_or_404(Salon, name=salon_name)
+    salon = _get_request_salon(request, salon_name)
     today = date.today()
 
     if not (request.user.is_superuser or request.user.is_staff):
@@ -86,14 +116,29 @@ def appointments_page(request, salon_name):
     context = {
         'salon': salon,
         'today': today,
+        'slot_events_url': reverse('salons:slot_events', args=[salon.name]) if settings.SLOT_EVENTS_ENABLED else None,
     }
 
     return render(request, 'salons/appointments.html', context)
 
 
+def _slots_etag(request, salon_name):
+    salon = get_owned_salon(request)
+    if salon is not None and salon.name == salon_name:
+        salon_id = salon.id
+    elif request.user.is_superuser or request.user.is_staff:
+        salon_id = Salon.objects.filter(name=salon_name).values_list('id', flat=True).first()
+    else:
+        return None
+
+    return get_availability_etag(salon_id, request.GET.get('date'))
+
+
 @require_barber_with_approved_salon
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_slots_etag)
 def get_slots_for_date(request, salon_name):
-    salon = get_object_or_404(Salon, name=salon_name)
+    salon = _get_request_salon(request, salon_name)
     date_str = request.GET.get('date')
     
     if not (request.user.is_superuser or request.user.is_staff):
@@ -105,61 +150,137 @@ def get_slots_for_date(request, salon_name):
     except:
         return JsonResponse({'error': 'Nevalidan format datuma'}, status=400)
     
-    slots = generate_time_slots_for_date(salon, target_date)
-
-    appointments = Appointment.objects.select_related('time_slot', 'service').filter(
-        time_slot__salon=salon,
-        time_slot__date=target_date
-    ).exclude(status='otkazano')
-
-    def get_slot_minutes(slot):
-        start = datetime.combine(slot.date, slot.begin_time)
-        end = datetime.combine(slot.date, slot.end_time)
-        minutes = int((end - start).total_seconds() / 60)
-        return minutes if minutes > 0 else 30
-
-    def build_appointment_ranges():
-        ranges = []
-        for appointment in appointments:
-            slot_minutes = get_slot_minutes(appointment.time_slot)
-            duration = appointment.service.duration if appointment.service else slot_minutes
-            start = datetime.combine(appointment.time_slot.date, appointment.time_slot.begin_time)
-            end = start + timedelta(minutes=duration)
-            ranges.append((start, end, appointment))
-        return ranges
-
-    appointment_ranges = build_appointment_ranges()
-
-    # Konvertuj u JSON format
-    slots_data = []
-    for slot in slots:
-        slot_start = datetime.combine(slot.date, slot.begin_time)
-        slot_end = datetime.combine(slot.date, slot.end_time)
-        overlapping_appointment = None
-
-        for appointment_start, appointment_end, appointment in appointment_ranges:
-            if slot_start < appointment_end and slot_end > appointment_start:
-                overlapping_appointment = appointment
-                break
-
-        status = 'zauzet' if overlapping_appointment else slot.status
-        has_appointment = bool(overlapping_appointment) or hasattr(slot, 'appointment')
-
-        slots_data.append({
-            'id': slot.id if slot.id else None,
-            'begin_time': slot.begin_time.strftime('%H:%M'),
-            'end_time': slot.end_time.strftime('%H:%M'),
-            'status': status,
-            'has_appointment': has_appointment
-        })
-    
-    return JsonResponse({'slots': slots_data})
+    return JsonResponse({'slots': _serialize_day_view(get_day_view(salon, target_date))})
+
+
+def _serialize_day_view(day_view):
+    return [
+        {
+            'id': slot['id'],
+            'begin_time': slot['begin_time'].strftime('%H:%M'),
+            'end_time': slot['end_time'].strftime('%H:%M'),
+            'status': slot['status'],
+            'has_appointment': slot['has_appointment']
+        }
+        for slot in day_view
+    ]
+
+
+async def _aslots_etag(request, salon_name):
+    user = await request.auser()
+    salon = await aget_owned_salon(request)
+    if salon is not None and salon.name == salon_name:
+        salon_id = salon.id
+    elif user.is_superuser or user.is_staff:
+        salon_id = await Salon.objects.filter(name=salon_name).values_list('id', flat=True).afirst()
+    else:
+        return None
+
+    return await aget_availability_etag(salon_id, request.GET.get('date'))
+
+
+@require_barber_with_approved_salon
+@cache_control(private=True, no_cache=True)
+@async_condition(etag_func=_aslots_etag)
+async def get_slots_for_date_async(request, salon_name):
+    """
+    Async (ASGI) varijanta get_slots_for_date sa istim odgovorom i ETag-om.
+    Koristi se kada je ASYNC_AVAILABILITY_VIEWS uključen.
+    """
+    user = await request.auser()
+    salon = await _aget_request_salon(request, salon_name)
+
+    if not (user.is_superuser or user.is_staff):
+        if salon.owner_id != user.id:
+            return HttpResponseForbidden("Nemate dozvolu da generišete slotove za ovaj salon!")
+
+    try:
+        target_date = datetime.strptime(request.GET.get('date') or '', '%Y-%m-%d').date()
+    except ValueError:
+        return JsonResponse({'error': 'Nevalidan format datuma'}, status=400)
+
+    return JsonResponse({'slots': _serialize_day_view(await aget_day_view(salon, target_date))})
+
+
+def _sse_message(event, data):
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+async def _slot_event_stream(salon, target_date, subscription):
+    """
+    Prvo šalje pun snimak dana, zatim posle svake promene dostupnosti samo
+    slotove čije se stanje promenilo. Promena celog salona (radno vreme,
+    interval) šalje ponovo pun snimak jer se mreža slotova mogla promeniti.
+    """
+    date_key = target_date.isoformat()
+    keepalive = settings.SLOT_EVENTS_KEEPALIVE
+    sent = {}
+    full = True
+
+    try:
+        while True:
+            slots = _serialize_day_view(await aget_day_view(salon, target_date))
+            # Stream traje dugo; konekcija niti zahteva se ne drži između promena
+            await sync_to_async(connections.close_all)()
+
+            changed = slots if full else [slot for slot in slots if sent.get(slot['begin_time']) != slot]
+            if changed:
+                yield _sse_message('slots', {'date': date_key, 'full': full, 'slots': changed})
+            sent = {slot['begin_time']: slot for slot in slots}
+
+            while True:
+                try:
+                    changed_keys = await subscription.get(keepalive)
+                except asyncio.TimeoutError:
+                    yield ': ping\n\n'
+                    continue
+                if date_key in changed_keys or SALON_WIDE in changed_keys:
+                    break
+
+            full = SALON_WIDE in changed_keys
+            if full:
+                salon = await Salon.objects.aget(pk=salon.pk)
+    finally:
+        get_broker().unsubscribe(subscription)
+
+
+@require_barber_with_approved_salon
+async def slot_events(request, salon_name):
+    """
+    Server-sent events: promene statusa slotova za ?date= u realnom vremenu,
+    umesto ponovnog učitavanja get_slots. Stream drži konekciju otvorenom, pa
+    radi samo pod ASGI serverom (SLOT_EVENTS_ENABLED, gunicorn_asgi.conf.py).
+    """
+    if not settings.SLOT_EVENTS_ENABLED:
+        return JsonResponse({'error': 'Događaji slotova nisu uključeni'}, status=404)
+
+    user = await request.auser()
+    salon = await _aget_request_salon(request, salon_name)
+
+    if not (user.is_superuser or user.is_staff):
+        if salon.owner_id != user.id:
+            return HttpResponseForbidden("Nemate dozvolu da pratite termine ovog salona")
+
+    try:
+        target_date = datetime.strptime(request.GET.get('date') or '', '%Y-%m-%d').date()
+    except ValueError:
+        return JsonResponse({'error': 'Nevalidan format datuma'}, status=400)
+
+    # Pretplata pre prvog snimka, da se ne izgubi promena između njih
+    subscription = get_broker().subscribe(salon.id)
+    response = StreamingHttpResponse(
+        _slot_event_stream(salon, target_date, subscription),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 
 @require_barber_with_approved_salon
 @require_POST
 def block_slot(request, salon_name, slot_id):
-    salon = get_object_or_404(Salon, name=salon_name)
+    salon = _get_request_salon(request, salon_name)
     slot = get_object_or_404(TimeSlot, id=slot_id, salon=salon)
 
     if not (request.user.is_superuser or request.user.is_staff):
@@ -174,10 +295,39 @@ def block_slot(request, salon_name, slot_id):
     return JsonResponse({'status': 'ok'})
 
 
+@require_barber_with_approved_salon
+@require_POST
+def block_slot_at_time(request, salon_name):
+    salon = _get_request_salon(request, salon_name)
+
+    if not (request.user.is_superuser or request.user.is_staff):
+        if salon.owner != request.user:
+            return HttpResponseForbidden("Nemate dozvolu da blokirate slotove za ovaj salon")
+
+    try:
+        payload = json.loads(request.body)
+        target_date = datetime.strptime(payload.get('date', ''), '%Y-%m-%d').date()
+        begin_time = datetime.strptime(payload.get('begin_time', ''), '%H:%M').time()
+    except (json.JSONDecodeError, AttributeError, TypeError, ValueError):
+        return JsonResponse({'error': 'Neispravan JSON payload'}, status=400)
+
+    try:
+        slot = get_or_create_slot(salon, target_date, begin_time)
+    except ValidationError as error:
+        return JsonResponse({'error': error.message}, status=400)
+
+    if hasattr(slot, 'appointment') or slot.status == 'zauzet':
+        return JsonResponse({'error': 'Slot već ima termin'}, status=400)
+
+    slot.status = 'blokiran'
+    slot.save(update_fields=['status'])
+    return JsonResponse({'status': 'ok', 'id': slot.id})
+
+
 @require_barber_with_approved_salon
 @require_POST
 def unblock_slot(request, salon_name, slot_id):
-    salon = get_object_or_404(Salon, name=salon_name)
+    salon = _get_request_salon(request, salon_name)
     slot = get_object_or_404(TimeSlot, id=slot_id, salon=salon)
 
     if not (request.user.is_superuser or request.user.is_staff):
@@ -194,34 +344,14 @@ def unblock_slot(request, salon_name, slot_id):
 
 @require_barber_with_approved_salon
 def appointment_details(request, salon_name, slot_id):
-    salon = get_object_or_404(Salon, name=salon_name)
+    salon = _get_request_salon(request, salon_name)
     slot = get_object_or_404(TimeSlot, id=slot_id, salon=salon)
 
     appointment = None
     if hasattr(slot, 'appointment'):
         appointment = slot.appointment
     else:
-        appointments = Appointment.objects.select_related('time_slot', 'service').filter(
-            time_slot__salon=salon,
-            time_slot__date=slot.date
-        ).exclude(status='otkazano')
-
-        slot_start = datetime.combine(slot.date, slot.begin_time)
-        slot_end = datetime.combine(slot.date, slot.end_time)
-
-        for candidate in appointments:
-            slot_minutes = int(
-                (datetime.combine(candidate.time_slot.date, candidate.time_slot.end_time) -
-                 datetime.combine(candidate.time_slot.date, candidate.time_slot.begin_time)).total_seconds() / 60
-            )
-            slot_minutes = slot_minutes if slot_minutes > 0 else 30
-            duration = candidate.service.duration if candidate.service else slot_minutes
-            candidate_start = datetime.combine(candidate.time_slot.date, candidate.time_slot.begin_time)
-            candidate_end = candidate_start + timedelta(minutes=duration)
-
-            if slot_start < candidate_end and slot_end > candidate_start:
-                appointment = candidate
-                break
+        appointment = load_day_occupancy(salon, slot.date).covering(slot.begin_time, slot.end_time)
 
     if not appointment:
         return JsonResponse({'error': 'Termin nije pronađen'}, status=404)
@@ -241,7 +371,7 @@ def appointment_details(request, salon_name, slot_id):
 @require_barber_with_approved_salon
 @require_POST
 def cancel_appointment(request, salon_name, slot_id):
-    salon = get_object_or_404(Salon, name=salon_name)
+    salon = _get_request_salon(request, salon_name)
     slot = get_object_or_404(TimeSlot, id=slot_id, salon=salon)
 
     if not (request.user.is_superuser or request.user.is_staff):
@@ -260,27 +390,7 @@ def cancel_appointment(request, salon_name, slot_id):
     if hasattr(slot, 'appointment'):
         appointment = slot.appointment
     else:
-        appointments = Appointment.objects.select_related('time_slot', 'service').filter(
-            time_slot__salon=salon,
-            time_slot__date=slot.date
-        ).exclude(status='otkazano')
-
-        slot_start = datetime.combine(slot.date, slot.begin_time)
-        slot_end = datetime.combine(slot.date, slot.end_time)
-
-        for candidate in appointments:
-            slot_minutes = int(
-                (datetime.combine(candidate.time_slot.date, candidate.time_slot.end_time) -
-                 datetime.combine(candidate.time_slot.date, candidate.time_slot.begin_time)).total_seconds() / 60
-            )
-            slot_minutes = slot_minutes if slot_minutes > 0 else 30
-            duration = candidate.service.duration if candidate.service else slot_minutes
-            candidate_start = datetime.combine(candidate.time_slot.date, candidate.time_slot.begin_time)
-            candidate_end = candidate_start + timedelta(minutes=duration)
-
-            if slot_start < candidate_end and slot_end > candidate_start:
-                appointment = candidate
-                break
+        appointment = load_day_occupancy(salon, slot.date).covering(slot.begin_time, slot.end_time)
 
     if not appointment:
         return JsonResponse({'error': 'Termin nije pronađen'}, status=404)
@@ -324,14 +434,7 @@ def cancel_appointment(request, salon_name, slot_id):
             </html>
             """
 
-            email_message = EmailMultiAlternatives(
-                subject,
-                message_text,
-                settings.DEFAULT_FROM_EMAIL,
-                [customer_email]
-            )
-            email_message.attach_alternative(message_html, 'text/html')
-            email_message.send(fail_silently=False)
+            enqueue_email(subject, message_text, [customer_email], html_message=message_html)
             email_sent = True
         except Exception:
             email_sent = False
@@ -342,23 +445,20 @@ def cancel_appointment(request, salon_name, slot_id):
 # SALON FORMS
 @login_required
 def create_salon(request):
-    profile, _ = UserProfile.objects.get_or_create(user=request.user)
+    profile = get_request_profile(request)
 
     if profile.role != 'frizer':
         messages.error(request, 'Samo frizeri mogu kreirati salone.')
         return redirect('home')
 
-    try:
-        salon = Salon.objects.get(owner=request.user)
-        
+    salon = get_owned_salon(request)
+    if salon is not None:
         if not salon.is_approved:
             messages.info(request, 'Vaš salon već čeka odobrenje.')
             return redirect('pending_approval')
         else:
             messages.info(request, 'Već imate salon.')
             return redirect('salons:salon_dashboard', salon_name=salon.name)
-    except Salon.DoesNotExist:
-        pass
 
     initial_hours = _build_initial_working_hours()
 
@@ -406,7 +506,7 @@ def create_salon(request):
 
 @require_barber_with_approved_salon
 def edit_salon(request, salon_name):
-    salon = get_object_or_404(Salon, name=salon_name)
+    salon = _get_request_salon(request, salon_name)
 
     if not (request.user.is_superuser or request.user.is_staff):
         if salon.owner != request.user:
@@ -421,10 +521,7 @@ def edit_salon(request, salon_name):
         if form.is_valid() and schedule_form.is_valid():
             try:
                 previous_interval = salon.slot_interval_minutes
-                previous_hours = {
-                    item.day: (item.is_working, item.opening_time, item.closing_time)
-                    for item in salon.working_hours.all()
-                }
+                previous_schedule = get_weekly_schedule(salon)
 
                 salon = form.save(commit=False)
                 salon.slot_interval_minutes = int(schedule_form.cleaned_data['slot_interval_minutes'])
@@ -433,15 +530,11 @@ def edit_salon(request, salon_name):
                 upsert_working_hours(salon, schedule_form.get_hours_payload())
 
                 interval_changed = previous_interval != salon.slot_interval_minutes
-                interval_update_summary = None
-                if interval_changed:
-                    interval_update_summary = regenerate_future_slots_without_booked_days(salon)
-                else:
-                    for item in salon.working_hours.all():
-                        previous = previous_hours.get(item.day)
-                        current = (item.is_working, item.opening_time, item.closing_time)
-                        if previous != current:
-                            regenerate_future_slots_after_hours_change(salon, item.day)
+                interval_update_summary = regenerate_future_slots_incremental(
+                    salon,
+                    previous_schedule,
+                    previous_interval
+                )
 
                 if interval_changed and interval_update_summary:
                     regenerated_days = interval_update_summary['regenerated_days']
@@ -486,7 +579,7 @@ def edit_salon(request, salon_name):
 # SERVICE FORMS
 @require_barber_with_approved_salon
 def create_service(request, salon_name):
-    salon = get_object_or_404(Salon, name=salon_name, owner=request.user)
+    salon = _get_request_salon(request, salon_name, owner=request.user)
 
     if not (request.user.is_superuser or request.user.is_staff):
         if salon.owner != request.user:
@@ -518,7 +611,7 @@ def create_service(request, salon_name):
 
 @require_barber_with_approved_salon
 def update_service(request, salon_name, service_id):
-    salon = get_object_or_404(Salon, name=salon_name, owner=request.user)
+    salon = _get_request_salon(request, salon_name, owner=request.user)
     service = get_object_or_404(Service, salon=salon, id=service_id)
 
     if not (request.user.is_superuser or request.user.is_staff):
@@ -549,7 +642,7 @@ def update_service(request, salon_name, service_id):
 
 @require_barber_with_approved_salon
 def delete_service(request, salon_name, service_id):
-    salon = get_object_or_404(Salon, name=salon_name, owner=request.user)
+    salon = _get_request_salon(request, salon_name, owner=request.user)
     service = get_object_or_404(Service, salon=salon, id=service_id)
 
     if not (request.user.is_superuser or request.user.is_staff):
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class SistemZakazivanjaConfig(AppConfig):
+    name = 'sistem_zakazivanja'
+
+    def ready(self):
+        from . import checks  # noqa: F401 - registruje system check-ove
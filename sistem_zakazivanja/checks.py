@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+from django.db import DatabaseError, connections
+
+
+def get_connections_per_worker(alias='default'):
+    """Najveći broj konekcija koje jedan worker može da drži otvorene"""
+    pool = connections.settings[alias].get('OPTIONS', {}).get('pool')
+    if pool:
+        return pool.get('max_size', 4) if isinstance(pool, dict) else 4
+    return getattr(settings, 'APP_WORKER_THREADS', 1)
+
+
+@register(Tags.database)
+def check_connection_budget(app_configs, databases=None, **kwargs):
+    """
+    Upozorava kada worker-i × konekcije po worker-u prelaze max_connections
+    Postgres servera (umanjeno za rezervisane superuser konekcije).
+    Pokreće se uz migrate i `manage.py check --database default`.
+    """
+    warnings = []
+    workers = getattr(settings, 'APP_WORKERS', 1)
+
+    for alias in databases or []:
+        connection = connections[alias]
+        if connection.vendor != 'postgresql':
+            continue
+
+        required = workers * get_connections_per_worker(alias)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT current_setting('max_connections')::int, "
+                    "current_setting('superuser_reserved_connections')::int"
+                )
+                max_connections, reserved = cursor.fetchone()
+        except DatabaseError:
+            continue
+
+        available = max_connections - reserved
+        if required > available:
+            warnings.append(Warning(
+                f'Worker-i mogu otvoriti do {required} konekcija ka bazi "{alias}", '
+                f'a server dozvoljava {available} (max_connections={max_connections}).',
+                hint='Smanjite WEB_CONCURRENCY, WEB_THREADS ili DB_POOL_MAX_SIZE, ili povećajte max_connections.',
+                id='sistem_zakazivanja.W001',
+            ))
+
+    return warnings
+
+
+@register()
+def check_slot_events_broker(app_configs, **kwargs):
+    """Upozorava kada SSE događaji idu kroz broker koji ne prelazi granicu procesa"""
+    if not getattr(settings, 'SLOT_EVENTS_ENABLED', False):
+        return []
+
+    workers = getattr(settings, 'APP_WORKERS', 1)
+    if workers > 1 and settings.SLOT_EVENTS_BROKER == 'salons.events.InProcessBroker':
+        return [Warning(
+            f'SSE događaji slotova koriste InProcessBroker, a aplikacija ima {workers} worker-a; '
+            'promena u jednom procesu ne stiže do klijenata povezanih na druge.',
+            hint='Postavite SLOT_EVENTS_BROKER=salons.events.PostgresNotifyBroker.',
+            id='sistem_zakazivanja.W002',
+        )]
+
+    return []
+
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Verzije dostupnosti (ETag-ovi i ključevi mapa dana) i keš imenika žive u
+    default cache-u. Sa cache-om lokalnim za proces izmena u jednom worker-u
+    ne poništava ih u ostalima, pa oni vraćaju 304 i zastarele slotove.
+    """
+    workers = getattr(settings, 'APP_WORKERS', 1)
+    backend = settings.CACHES['default']['BACKEND']
+
+    if workers > 1 and backend in PROCESS_LOCAL_CACHES:
+        return [Error(
+            f'Default cache ({backend}) je lokalan za proces, a aplikacija ima {workers} worker-a; '
+            'verzije dostupnosti se ne bi poništavale u ostalim worker-ima.',
+            hint='Postavite CACHE_BACKEND na deljeni cache (Redis ili Memcached) i CACHE_LOCATION.',
+            id='sistem_zakazivanja.E001',
+        )]
+
+    return []
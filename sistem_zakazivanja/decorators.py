@@ -1,8 +1,28 @@
 from django.shortcuts import redirect
 from django.contrib import messages
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from asgiref.sync import iscoroutinefunction
 from functools import wraps
-from salons.models import Salon
-from .models import UserProfile
+from .profiles import get_request_profile, get_owned_salon, aget_request_profile, aget_owned_salon
+
+
+def _barber_redirect(request, profile, salon):
+    '''Preusmerenje za korisnika koji nije frizer sa odobrenim salonom, inače None'''
+    if profile.role != 'frizer':
+        messages.error(request, 'Samo frizeri mogu pristupiti ovoj stranici.')
+        return redirect('customers:home')
+
+    if salon is None:
+        messages.warning(request, 'Prvo kreirajte svoj salon.')
+        return redirect('salons:create_salon')
+
+    if not salon.is_approved:
+        messages.info(request, 'Vaš salon čeka odobrenje administratora.')
+        return redirect('pending_approval')
+
+    return None
+
 
 def require_barber_with_approved_salon(view_func):
     '''
@@ -11,33 +31,72 @@ def require_barber_with_approved_salon(view_func):
         - korisnik koji je frizer
         - korisnik ima salon
         - salon je odobren
+    Radi i sa async view-ovima (profil i salon se tada učitavaju async ORM-om).
     '''
 
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            user = await request.auser()
+            if not user.is_authenticated:
+                messages.warning(request, 'Morate biti ulogovani.')
+                return redirect('login')
+
+            profile = await aget_request_profile(request)
+
+            if user.is_superuser or user.is_staff:
+                return await view_func(request, *args, **kwargs)
+
+            response = _barber_redirect(request, profile, await aget_owned_salon(request))
+            if response is not None:
+                return response
+
+            return await view_func(request, *args, **kwargs)
+
+        return async_wrapper
+
     @wraps(view_func)
     def wrapper(request, *args, **kwargs):
         if not request.user.is_authenticated:
             messages.warning(request, 'Morate biti ulogovani.')
             return redirect('login')
 
-        profile, _ = UserProfile.objects.get_or_create(user=request.user)
+        profile = get_request_profile(request)
 
         if request.user.is_superuser or request.user.is_staff:
             return view_func(request, *args, **kwargs)
-        
-        if profile.role != 'frizer':
-            messages.error(request, 'Samo frizeri mogu pristupiti ovoj stranici.')
-            return redirect('customers:home')
-        
-        try:
-            salon = Salon.objects.get(owner=request.user)
-        except Salon.DoesNotExist:
-            messages.warning(request, 'Prvo kreirajte svoj salon.')
-            return redirect('salons:create_salon')
-        
-        if not salon.is_approved:
-            messages.info(request, 'Vaš salon čeka odobrenje administratora.')
-            return redirect('pending_approval')
-        
+
+        response = _barber_redirect(request, profile, get_owned_salon(request))
+        if response is not None:
+            return response
+
         return view_func(request, *args, **kwargs)
-    
-    return wrapper 
\ No newline at end of file
+
+    return wrapper
+
+
+def async_condition(etag_func):
+    '''
+    Kao django.views.decorators.http.condition(etag_func=...), ali za async
+    view sa async etag_func. Django-ov condition etag_func poziva sinhrono,
+    pa u async view-u ne bi mogao da koristi async ORM i cache.
+    '''
+
+    def decorator(view_func):
+        @wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            etag = await etag_func(request, *args, **kwargs)
+            etag = quote_etag(etag) if etag else None
+
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = await view_func(request, *args, **kwargs)
+
+            if etag and request.method in ('GET', 'HEAD') and not response.has_header('ETag'):
+                response.headers['ETag'] = etag
+
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,139 @@
+from datetime import timedelta
+import logging
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_BASE_SECONDS = 60
+# Koliko dugo je preuzeta poruka nevidljiva drugim worker-ima; mora biti duže
+# od slanja celog batch-a, inače drugi worker može poslati istu poruku
+OUTBOX_LEASE_SECONDS = 300
+
+
+def enqueue_email(subject, body_text, recipients, html_message='', from_email=None):
+    """
+    Upisuje email u outbox umesto slanja u toku zahteva.
+    Šalje ga `manage.py send_outbox` worker.
+    """
+    if isinstance(recipients, str):
+        recipients = [recipients]
+
+    return OutboundEmail.objects.create(
+        subject=subject,
+        body_text=body_text,
+        body_html=html_message or '',
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipients),
+    )
+
+
+def get_retry_delay(attempts):
+    """Eksponencijalni backoff: 1, 2, 4, 8... puta osnovni interval"""
+    base_seconds = getattr(settings, 'EMAIL_OUTBOX_RETRY_BASE_SECONDS', OUTBOX_RETRY_BASE_SECONDS)
+    return timedelta(seconds=base_seconds * (2 ** max(attempts - 1, 0)))
+
+
+def build_message(outbound_email, connection=None):
+    message = EmailMultiAlternatives(
+        outbound_email.subject,
+        outbound_email.body_text,
+        outbound_email.from_email,
+        outbound_email.recipients,
+        connection=connection,
+    )
+    if outbound_email.body_html:
+        message.attach_alternative(outbound_email.body_html, 'text/html')
+    return message
+
+
+def claim_outbox_batch(batch_size):
+    """
+    Preuzima dospele emailove kratkom transakcijom: redovi se zaključavaju sa
+    skip_locked i next_attempt_at im se pomera za OUTBOX_LEASE_SECONDS, pa ih
+    drugi worker-i ne vide dok traje slanje. Ako worker padne, poruke ponovo
+    dospevaju kad lease istekne.
+    """
+    lease = timedelta(seconds=getattr(settings, 'EMAIL_OUTBOX_LEASE_SECONDS', OUTBOX_LEASE_SECONDS))
+
+    with transaction.atomic():
+        now = timezone.now()
+        batch = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True).filter(
+                status='na čekanju',
+                next_attempt_at__lte=now
+            ).order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if batch:
+            OutboundEmail.objects.filter(pk__in=[item.pk for item in batch]).update(next_attempt_at=now + lease)
+
+    return batch
+
+
+def send_outbox_batch(batch_size=None):
+    """
+    Šalje jedan batch dospelih emailova preko jedne SMTP konekcije.
+    Neuspešni se ponovo zakazuju sa backoff-om; posle OUTBOX_MAX_ATTEMPTS
+    pokušaja prelaze u status 'neuspešno' (dead-letter).
+
+    Slanje ide van transakcije (redovi su preuzeti sa claim_outbox_batch), a
+    ishod svake poruke se upisuje posebnim kratkim upitom, pa spor SMTP
+    server ne drži otvorenu transakciju ni zaključane redove.
+
+    Vraća rečnik sa brojem poslatih, odloženih i odbačenih poruka.
+    """
+    batch_size = batch_size or getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', OUTBOX_BATCH_SIZE)
+    max_attempts = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', OUTBOX_MAX_ATTEMPTS)
+    summary = {'sent': 0, 'retried': 0, 'failed': 0}
+
+    batch = claim_outbox_batch(batch_size)
+    if not batch:
+        return summary
+
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as error:
+        logger.exception('Neuspešno otvaranje SMTP konekcije za outbox.')
+        for outbound_email in batch:
+            _register_failure(outbound_email, error, max_attempts, summary)
+        return summary
+
+    try:
+        for outbound_email in batch:
+            try:
+                connection.send_messages([build_message(outbound_email, connection=connection)])
+            except Exception as error:
+                logger.warning('Neuspešno slanje emaila iz outbox-a (id=%s): %s', outbound_email.pk, error)
+                _register_failure(outbound_email, error, max_attempts, summary)
+                continue
+
+            outbound_email.status = 'poslato'
+            outbound_email.attempts += 1
+            outbound_email.sent_at = timezone.now()
+            outbound_email.last_error = ''
+            outbound_email.save(update_fields=['status', 'attempts', 'sent_at', 'last_error'])
+            summary['sent'] += 1
+    finally:
+        connection.close()
+
+    return summary
+
+
+def _register_failure(outbound_email, error, max_attempts, summary):
+    outbound_email.attempts += 1
+    outbound_email.last_error = str(error)
+
+    if outbound_email.attempts >= max_attempts:
+        outbound_email.status = 'neuspešno'
+        summary['failed'] += 1
+    else:
+        outbound_email.next_attempt_at = timezone.now() + get_retry_delay(outbound_email.attempts)
+        summary['retried'] += 1
+
+    outbound_email.save(update_fields=['status', 'attempts', 'last_error', 'next_attempt_at'])
@@ -129,11 +129,11 @@ class RegistrationForm(UserCreationForm):
             # Sačuvaj User u bazu
             user.save()
             
-            # Signal je automatski kreirao UserProfile
-            # Sada ažuriraj phone u profilu
-            profile, _ = UserProfile.objects.get_or_create(user=user)
-            profile.phone = self.cleaned_data.get('phone', '')
-            profile.save()
+            # Signal je automatski kreirao UserProfile (email_verified=False,
+            # bez pending_email); ostaje samo phone, jednim UPDATE upitom
+            phone = self.cleaned_data.get('phone', '')
+            if phone:
+                UserProfile.objects.filter(user=user).update(phone=phone)
         
         return user
 
@@ -212,13 +212,17 @@ class UserEditForm(forms.ModelForm):
             },
         }
 
-    def __init__(self, *args, user=None, **kwargs):
+    def __init__(self, *args, user=None, profile=None, **kwargs):
         super().__init__(*args, **kwargs)
         self.user = user or self.instance
+        # View prosleđuje profil već učitan za zahtev (get_request_profile)
+        self.profile = profile
 
-        if self.user and getattr(self.user, 'pk', None):
-            profile, _ = UserProfile.objects.get_or_create(user=self.user)
-            self.fields['phone'].initial = profile.phone
+        if self.profile is None and self.user and getattr(self.user, 'pk', None):
+            self.profile = UserProfile.objects.get(user=self.user)
+
+        if self.profile is not None:
+            self.fields['phone'].initial = self.profile.phone
 
     def clean_username(self):
         username = self.cleaned_data.get('username')
@@ -287,14 +291,17 @@ class UserEditForm(forms.ModelForm):
         if commit:
             user.save()
 
-        profile, _ = UserProfile.objects.get_or_create(user=user)
-        profile.phone = self.cleaned_data.get('phone', '')
+        profile = self.profile
+        profile_values = {'phone': self.cleaned_data.get('phone', '')}
 
         if self.email_change_requested:
-            profile.pending_email = self.pending_email
-            profile.email_verified = False
+            profile_values['pending_email'] = self.pending_email
+            profile_values['email_verified'] = False
 
         if commit:
-            profile.save()
+            profile.update_changed(**profile_values)
+        else:
+            for name, value in profile_values.items():
+                setattr(profile, name, value)
 
         return user
\ No newline at end of file
@@ -0,0 +1,27 @@
+import time
+from django.core.management.base import BaseCommand
+from sistem_zakazivanja.emails import send_outbox_batch
+
+
+class Command(BaseCommand):
+    help = 'Šalje emailove iz outbox-a (jedna SMTP konekcija po batch-u, retry sa backoff-om)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--loop', action='store_true', help='Radi neprekidno umesto jednog prolaza')
+        parser.add_argument('--sleep', type=float, default=5.0, help='Pauza između prolaza u sekundama (uz --loop)')
+
+    def handle(self, *args, **options):
+        while True:
+            summary = send_outbox_batch(batch_size=options['batch_size'])
+            if any(summary.values()):
+                self.stdout.write(
+                    f"Poslato: {summary['sent']}, ponovni pokušaj: {summary['retried']}, neuspešno: {summary['failed']}"
+                )
+
+            if not options['loop']:
+                break
+
+            # Kad outbox nema dospelih poruka, sačekaj pre sledećeg prolaza
+            if not any(summary.values()):
+                time.sleep(options['sleep'])
@@ -0,0 +1,62 @@
+from collections import deque
+import math
+import time
+
+
+REQUEST_METRICS_BUFFER_SIZE = 5000
+
+# Prsten poslednjih merenja. deque.append sa maxlen je atomska operacija
+# pod GIL-om, pa upis iz više niti ne traži lock; najstarija merenja ispadaju.
+_samples = deque(maxlen=REQUEST_METRICS_BUFFER_SIZE)
+
+
+def configure_buffer(size):
+    """Menja veličinu prstena (zadržava najnovija merenja)"""
+    global _samples
+    _samples = deque(_samples, maxlen=size)
+
+
+def record_request(view_name, queries, db_ms, total_ms, response_bytes):
+    _samples.append((time.time(), view_name, queries, db_ms, total_ms, response_bytes))
+
+
+def clear_samples():
+    _samples.clear()
+
+
+def _percentile(sorted_values, percent):
+    if not sorted_values:
+        return 0
+    index = max(math.ceil(len(sorted_values) * percent / 100) - 1, 0)
+    return sorted_values[index]
+
+
+def get_view_stats():
+    """
+    Agregati po imenu view-a iz trenutnog sadržaja prstena (samo ovaj proces).
+    Vraća listu rečnika sortiranu po ukupnom vremenu, najskuplji prvi.
+    """
+    grouped = {}
+    for _, view_name, queries, db_ms, total_ms, response_bytes in _samples.copy():
+        grouped.setdefault(view_name, []).append((queries, db_ms, total_ms, response_bytes))
+
+    stats = []
+    for view_name, rows in grouped.items():
+        count = len(rows)
+        query_counts = sorted(row[0] for row in rows)
+        total_times = sorted(row[2] for row in rows)
+        stats.append({
+            'view': view_name,
+            'requests': count,
+            'queries_avg': round(sum(query_counts) / count, 2),
+            'queries_max': query_counts[-1],
+            'db_ms_avg': round(sum(row[1] for row in rows) / count, 2),
+            'total_ms_avg': round(sum(total_times) / count, 2),
+            'total_ms_p50': round(_percentile(total_times, 50), 2),
+            'total_ms_p95': round(_percentile(total_times, 95), 2),
+            'total_ms_sum': round(sum(total_times), 2),
+            'bytes_avg': round(sum(row[3] for row in rows) / count),
+        })
+
+    stats.sort(key=lambda item: item['total_ms_sum'], reverse=True)
+    return stats
@@ -0,0 +1,111 @@
+from contextlib import ExitStack
+import logging
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+UNRESOLVED_VIEW_NAME = '<nerazrešeno>'
+
+
+class _QueryTracker:
+    """execute_wrapper koji broji upite i meri vreme u bazi za jedan zahtev"""
+
+    __slots__ = ('queries', 'db_seconds')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_seconds += time.perf_counter() - started
+
+
+def _install_tracker(stack, tracker):
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(tracker))
+
+
+class RequestMetricsMiddleware:
+    """
+    Meri broj SQL upita, vreme u bazi, ukupno vreme i veličinu odgovora po
+    imenu razrešenog URL-a (npr. 'salons:get_slots') i upisuje ih u prsten
+    u sistem_zakazivanja.metrics. Radi i bez DEBUG-a jer upite broji preko
+    connection.execute_wrapper, ne preko connection.queries.
+
+    Kada view pređe budžet upita (VIEW_QUERY_BUDGETS, inače
+    VIEW_QUERY_BUDGET_DEFAULT), loguje se upozorenje.
+
+    Podržava i sync i async lanac, pa pod ASGI-jem ne vezuje zahtev za nit.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        self.budgets = getattr(settings, 'VIEW_QUERY_BUDGETS', {})
+        self.default_budget = getattr(settings, 'VIEW_QUERY_BUDGET_DEFAULT', None)
+        metrics.configure_buffer(
+            getattr(settings, 'REQUEST_METRICS_BUFFER_SIZE', metrics.REQUEST_METRICS_BUFFER_SIZE)
+        )
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        tracker = _QueryTracker()
+        started = time.perf_counter()
+
+        with ExitStack() as stack:
+            _install_tracker(stack, tracker)
+            response = self.get_response(request)
+
+        return self._record(request, response, tracker, started)
+
+    async def __acall__(self, request):
+        tracker = _QueryTracker()
+        started = time.perf_counter()
+
+        # Konekcije su vezane za nit, a async ORM upite izvršava u
+        # thread_sensitive niti zahteva; wrapper se zato postavlja i skida
+        # u toj istoj niti
+        stack = ExitStack()
+        await sync_to_async(_install_tracker)(stack, tracker)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+
+        return self._record(request, response, tracker, started)
+
+    def _record(self, request, response, tracker, started):
+        total_ms = (time.perf_counter() - started) * 1000
+        resolver_match = getattr(request, 'resolver_match', None)
+        view_name = resolver_match.view_name if resolver_match else UNRESOLVED_VIEW_NAME
+        response_bytes = 0 if response.streaming else len(response.content)
+
+        metrics.record_request(view_name, tracker.queries, tracker.db_seconds * 1000, total_ms, response_bytes)
+
+        budget = self.budgets.get(view_name, self.default_budget)
+        if budget is not None and tracker.queries > budget:
+            logger.warning(
+                'View %s je izvršio %s SQL upita (budžet %s, %.0f ms, %s %s).',
+                view_name, tracker.queries, budget, total_ms, request.method, request.path
+            )
+
+        return response
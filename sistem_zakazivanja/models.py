@@ -3,6 +3,7 @@ from django.core.exceptions import ValidationError
 from django.contrib.auth.models import User
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils import timezone
 
 class UserProfile(models.Model):
     ROLE_CHOICES = [
@@ -18,6 +19,20 @@ class UserProfile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    def update_changed(self, **values):
+        """
+        Postavlja prosleđena polja i čuva samo ona koja su se stvarno promenila.
+        Vraća True ako je bilo upisa u bazu.
+        """
+        changed_fields = [name for name, value in values.items() if getattr(self, name) != value]
+        if not changed_fields:
+            return False
+
+        for name in changed_fields:
+            setattr(self, name, values[name])
+        self.save(update_fields=changed_fields + ['updated_at'])
+        return True
+
     def __str__(self):
         return f"{self.user.username} - {self.role or 'No role'}"
     
@@ -25,12 +40,38 @@ class UserProfile(models.Model):
 # SIGNALS
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
-    """Automatski kreiraj UserProfile kada se User kreira"""
+    """
+    Jedino mesto gde se UserProfile kreira. Kasniji User.save() pozivi
+    (npr. last_login pri prijavi) ne diraju profil.
+    """
     if created:
         UserProfile.objects.create(user=instance)
 
-@receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    """Automatski sačuvaj UserProfile kada se User sačuva"""
-    UserProfile.objects.get_or_create(user=instance)
-    instance.userprofile.save()
\ No newline at end of file
+class OutboundEmail(models.Model):
+    STATUS_CHOICES = [
+        ('na čekanju', 'Na čekanju'),
+        ('poslato', 'Poslato'),
+        ('neuspešno', 'Neuspešno'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body_text = models.TextField()
+    body_html = models.TextField(blank=True)
+    from_email = models.CharField(max_length=255)
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='na čekanju')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "Email outbox"
+        ordering = ['next_attempt_at', 'id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.status})"
@@ -0,0 +1,66 @@
+from salons.models import Salon
+from .models import UserProfile
+
+
+def _load_profile_and_salon(user):
+    """Profil i salon korisnika jednim upitom (profil -> user -> salon join)"""
+    if not user.is_authenticated:
+        return None, None
+
+    profile = UserProfile.objects.select_related('user__salon').filter(user=user).first()
+    if profile is None:
+        profile, _ = UserProfile.objects.get_or_create(user=user)
+        return profile, Salon.objects.filter(owner=user).first()
+
+    try:
+        owned_salon = profile.user.salon
+    except Salon.DoesNotExist:
+        owned_salon = None
+
+    return profile, owned_salon
+
+
+async def _aload_profile_and_salon(user):
+    """Async varijanta _load_profile_and_salon (isti upiti kroz async ORM)"""
+    if not user.is_authenticated:
+        return None, None
+
+    profile = await UserProfile.objects.select_related('user__salon').filter(user=user).afirst()
+    if profile is None:
+        profile, _ = await UserProfile.objects.aget_or_create(user=user)
+        return profile, await Salon.objects.filter(owner=user).afirst()
+
+    try:
+        owned_salon = profile.user.salon
+    except Salon.DoesNotExist:
+        owned_salon = None
+
+    return profile, owned_salon
+
+
+def get_request_profile(request):
+    """
+    Vraća UserProfile ulogovanog korisnika, razrešen najviše jednom po zahtevu.
+    Rezultat se čuva na request.profile i request.owned_salon.
+    """
+    if not hasattr(request, 'profile'):
+        request.profile, request.owned_salon = _load_profile_and_salon(request.user)
+    return request.profile
+
+
+def get_owned_salon(request):
+    """Salon ulogovanog korisnika (ili None), iz istog upita kao i profil"""
+    get_request_profile(request)
+    return request.owned_salon
+
+
+async def aget_request_profile(request):
+    """Async varijanta get_request_profile; korisnika učitava sa request.auser()"""
+    if not hasattr(request, 'profile'):
+        request.profile, request.owned_salon = await _aload_profile_and_salon(await request.auser())
+    return request.profile
+
+
+async def aget_owned_salon(request):
+    await aget_request_profile(request)
+    return request.owned_salon
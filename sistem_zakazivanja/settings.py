@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
 import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 from decouple import config
@@ -30,6 +31,9 @@ SECRET_KEY = config('SECRET_KEY', default='change_me_later')
 # Debug false na serveru, može true za lokalni razvoj
 DEBUG = config('DEBUG', default=False, cast=bool)
 
+# manage.py test (test runner uvek radi sa DEBUG=False)
+TESTING = sys.argv[1:2] == ['test']
+
 # Domena / IP za ALLOWED_HOSTS
 ALLOWED_HOSTS = [host.strip() for host in os.getenv('ALLOWED_HOSTS', '127.0.0.1').split(',')]
 
@@ -47,8 +51,15 @@ INSTALLED_APPS = [
     'salons',
 ]
 
+# WhiteNoise je sync middleware; pod ASGI-jem bi svaki zahtev vezao za nit,
+# pa ga ASGI profil (gunicorn_asgi.conf.py) isključuje i statiku služi proxy
+# direktno iz STATIC_ROOT (imena sa hešom, keširanje zauvek)
+WHITENOISE_ENABLED = os.getenv('WHITENOISE_ENABLED', 'True') == 'True'
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    *(['whitenoise.middleware.WhiteNoiseMiddleware'] if WHITENOISE_ENABLED else []),
+    'sistem_zakazivanja.middleware.RequestMetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -88,9 +99,82 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD', default=''),
         'HOST': config('DB_HOST', default='localhost'),
         'PORT': config('DB_PORT', default='5432'),
+        # Konekcija se zadržava između zahteva umesto otvaranja nove za svaki;
+        # pre ponovne upotrebe proverava se da li je još živa
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
     }
 }
 
+# Opcioni pool konekcija (Django + psycopg 3: pip install "psycopg[binary,pool]").
+# Sa pool-om se CONN_MAX_AGE mora isključiti - konekcije drži pool.
+DB_POOL = config('DB_POOL', default=False, cast=bool)
+DB_POOL_MIN_SIZE = config('DB_POOL_MIN_SIZE', default=2, cast=int)
+DB_POOL_MAX_SIZE = config('DB_POOL_MAX_SIZE', default=4, cast=int)
+DB_POOL_TIMEOUT = config('DB_POOL_TIMEOUT', default=10, cast=int)
+
+if DB_POOL and DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': DB_POOL_MIN_SIZE,
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': DB_POOL_TIMEOUT,
+        },
+    }
+
+# Broj gunicorn worker-a i niti po worker-u (gunicorn čita isti WEB_CONCURRENCY);
+# koristi se za proveru da konekcije svih worker-a staju u max_connections
+APP_WORKERS = config('WEB_CONCURRENCY', default=1, cast=int)
+APP_WORKER_THREADS = config('WEB_THREADS', default=1, cast=int)
+
+
+# Cache
+# Lokalna memorija je podrazumevana i dovoljna je samo za jedan proces. Sa više
+# worker-a (WEB_CONCURRENCY > 1) cache mora biti deljen jer u njemu žive verzije
+# dostupnosti (provera sistem_zakazivanja.E001), npr.
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# i CACHE_LOCATION=redis://127.0.0.1:6379/1
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'salon-app'),
+    }
+}
+
+SALON_DIRECTORY_CACHE_TIMEOUT = int(os.getenv('SALON_DIRECTORY_CACHE_TIMEOUT', 300))
+SALON_DIRECTORY_PAGE_SIZE = int(os.getenv('SALON_DIRECTORY_PAGE_SIZE', 12))
+
+# Async (ASGI) varijante available_slots i get_slots_for_date na istim URL-ovima;
+# uključiti samo kada aplikacija radi pod ASGI serverom (gunicorn_asgi.conf.py)
+ASYNC_AVAILABILITY_VIEWS = os.getenv('ASYNC_AVAILABILITY_VIEWS', 'False') == 'True'
+
+# Promene slotova uživo (SSE) na stranici termina; traži ASGI server.
+# InProcessBroker radi samo u okviru jednog procesa, sa više worker-a koristiti
+# salons.events.PostgresNotifyBroker (LISTEN/NOTIFY)
+SLOT_EVENTS_ENABLED = os.getenv('SLOT_EVENTS_ENABLED', 'False') == 'True'
+SLOT_EVENTS_BROKER = os.getenv('SLOT_EVENTS_BROKER', 'salons.events.InProcessBroker')
+SLOT_EVENTS_KEEPALIVE = int(os.getenv('SLOT_EVENTS_KEEPALIVE', 15))
+
+
+# Merenje zahteva (upiti, vreme u bazi, ukupno vreme, veličina odgovora po view-u)
+# Agregati za ovaj proces: /metrics/views/ (samo staff)
+
+REQUEST_METRICS_ENABLED = os.getenv('REQUEST_METRICS_ENABLED', 'True') == 'True'
+REQUEST_METRICS_BUFFER_SIZE = int(os.getenv('REQUEST_METRICS_BUFFER_SIZE', 5000))
+
+# Budžet SQL upita po view-u; prekoračenje se loguje kao upozorenje
+VIEW_QUERY_BUDGET_DEFAULT = int(os.getenv('VIEW_QUERY_BUDGET_DEFAULT', 25))
+VIEW_QUERY_BUDGETS = {
+    'salons:get_slots': 6,
+    'customers:available_slots': 8,
+    'customers:available_slots_range': 8,
+    # Izmereno: uspešno zakazivanje 20 upita (sa BEGIN/COMMIT), prikaz forme 6
+    'customers:booking_form': 22,
+    'customers:home': 6,
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -130,6 +214,26 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 
+# collectstatic pravi imena sa hešom sadržaja (main.3f2a9c.css) i .gz/.br
+# kopije; WhiteNoise ih servira iz procesa uz Cache-Control immutable, pa
+# pregledač ne šalje uslovne zahteve za statiku.
+# Manifest postoji tek posle collectstatic, pa se u razvoju i testovima
+# koristi obična storage klasa ({% static %} bi inače bacao ValueError)
+STATICFILES_STORAGE_BACKEND = os.getenv(
+    'STATICFILES_STORAGE',
+    'django.contrib.staticfiles.storage.StaticFilesStorage'
+    if DEBUG or TESTING else 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+)
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': STATICFILES_STORAGE_BACKEND,
+    },
+}
+WHITENOISE_MAX_AGE = int(os.getenv('WHITENOISE_MAX_AGE', 60 * 60))
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
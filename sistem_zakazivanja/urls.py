@@ -30,6 +30,7 @@ urlpatterns = [
     path('register/', views.register_page, name='register'),
     path('register/choose_role/', views.choose_role, name='choose_role'),
     path('pending_apporval/', views.pending_approval_view, name='pending_approval'),
+    path('metrics/views/', views.request_metrics, name='request_metrics'),
     path('logout/', auth_views.LogoutView.as_view(next_page='landing'), name='logout'),
 
     path('admin/', admin.site.urls),
@@ -1,17 +1,22 @@
+import os
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth import update_session_auth_hash
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django.contrib import messages
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.mail import EmailMultiAlternatives
 from django.core import signing
 from django.core.signing import BadSignature, SignatureExpired
 from django.urls import reverse
 from .forms import RegistrationForm, CustomLoginForm, UserEditForm
 from .models import UserProfile
-from salons.models import Salon
+from .emails import enqueue_email
+from .profiles import get_request_profile, get_owned_salon
+from .metrics import get_view_stats
+from salons.availability import get_day_map_cache_stats
 
 
 EMAIL_VERIFY_SALT = 'email-verify-v1'
@@ -55,14 +60,7 @@ def _send_verification_email(request, user, email, purpose):
     </html>
     """
 
-    message = EmailMultiAlternatives(
-        subject,
-        body_text,
-        settings.DEFAULT_FROM_EMAIL,
-        [email]
-    )
-    message.attach_alternative(body_html, 'text/html')
-    message.send(fail_silently=False)
+    enqueue_email(subject, body_text, [email], html_message=body_html)
 
 
 def verify_email(request, token):
@@ -87,9 +85,7 @@ def verify_email(request, token):
             messages.error(request, 'Email adresa za potvrdu se ne poklapa.')
             return redirect('login')
 
-        profile.email_verified = True
-        profile.pending_email = ''
-        profile.save(update_fields=['email_verified', 'pending_email'])
+        profile.update_changed(email_verified=True, pending_email='')
         messages.success(request, 'Email adresa je uspešno potvrđena. Sada možete da se ulogujete.')
         return redirect('login')
 
@@ -100,9 +96,7 @@ def verify_email(request, token):
 
         user.email = email
         user.save(update_fields=['email'])
-        profile.email_verified = True
-        profile.pending_email = ''
-        profile.save(update_fields=['email_verified', 'pending_email'])
+        profile.update_changed(email_verified=True, pending_email='')
         messages.success(request, 'Nova email adresa je uspešno potvrđena. Sada možete da se ulogujete.')
         return redirect('login')
 
@@ -151,7 +145,7 @@ def login_page(request):
 def redirect_after_login(request):
     """Pametna redirekcija nakon login-a"""
     user = request.user
-    profile, _ = UserProfile.objects.get_or_create(user=user)
+    profile = get_request_profile(request)
 
     if not profile.email_verified:
         logout(request)
@@ -168,18 +162,17 @@ def redirect_after_login(request):
         return redirect('customers:home')
     
     if profile.role == 'frizer':
-        try:
-            salon = Salon.objects.get(owner=user)
-            
-            if not salon.is_approved:
-                messages.info(request, 'Vaš salon još uvek čeka odobrenje.')
-                return redirect('pending_approval')
-
-            return redirect('salons:salon_dashboard', salon_name=salon.name)
-        
-        except Salon.DoesNotExist:
+        salon = get_owned_salon(request)
+
+        if salon is None:
             messages.warning(request, 'Prvo kreirajte svoj salon.')
             return redirect('salons:create_salon')
+
+        if not salon.is_approved:
+            messages.info(request, 'Vaš salon još uvek čeka odobrenje.')
+            return redirect('pending_approval')
+
+        return redirect('salons:salon_dashboard', salon_name=salon.name)
     
     # Fallback
     return redirect('customers:home')
@@ -195,10 +188,6 @@ def register_page(request):
         if form.is_valid():
             try:
                 user = form.save()
-                profile, _ = UserProfile.objects.get_or_create(user=user)
-                profile.email_verified = False
-                profile.pending_email = ''
-                profile.save(update_fields=['email_verified', 'pending_email'])
 
                 _send_verification_email(request, user, user.email, purpose='register')
                 messages.success(request, 'Nalog je uspešno kreiran.')
@@ -216,7 +205,7 @@ def register_page(request):
 
 @login_required
 def choose_role(request):
-    profile, _ = UserProfile.objects.get_or_create(user=request.user)
+    profile = get_request_profile(request)
 
     if not profile.email_verified:
         logout(request)
@@ -236,8 +225,7 @@ def choose_role(request):
             messages.error(request, 'Izaberite odgovarajuci role')
             return redirect('choose_role')
         
-        profile.role = role
-        profile.save()
+        profile.update_changed(role=role)
         
         if role == 'musterija':
             messages.success(request, 'Uspešno ste se registrovali!')
@@ -252,16 +240,14 @@ def choose_role(request):
 
 @login_required
 def pending_approval_view(request):
-    user = request.user
-    profile, _ = UserProfile.objects.get_or_create(user=user)
+    profile = get_request_profile(request)
     
     if profile.role != 'frizer':
         messages.info(request, 'Ova stranica je samo za frizere.')
         return redirect('home')
 
-    try:
-        salon = Salon.objects.get(owner=request.user)
-    except Salon.DoesNotExist:
+    salon = get_owned_salon(request)
+    if salon is None:
         return redirect("create_salon")
 
     if salon.is_approved:
@@ -273,7 +259,7 @@ def pending_approval_view(request):
 @login_required
 def userEditForm(request):
     if request.method == 'POST':
-        form = UserEditForm(request.POST, instance=request.user, user=request.user)
+        form = UserEditForm(request.POST, instance=request.user, user=request.user, profile=get_request_profile(request))
         if form.is_valid():
             user = form.save()
             if getattr(form, 'password_changed', False):
@@ -294,6 +280,18 @@ def userEditForm(request):
             return redirect('user_edit')
         messages.error(request, 'Molimo vas ispravite greške u formi.')
     else:
-        form = UserEditForm(instance=request.user, user=request.user)
+        form = UserEditForm(instance=request.user, user=request.user, profile=get_request_profile(request))
 
-    return render(request, 'edit_user.html', {'form': form})
\ No newline at end of file
+    return render(request, 'edit_user.html', {'form': form})
+
+@staff_member_required
+def request_metrics(request):
+    """
+    Agregati merenja zahteva po view-u i brojači cache-a dnevnih mapa za
+    proces koji je odgovorio (uz deljeni cache brojači su za sve procese)
+    """
+    return JsonResponse({
+        'pid': os.getpid(),
+        'views': get_view_stats(),
+        'day_map_cache': get_day_map_cache_stats(),
+    })